@@ -1,13 +1,14 @@
-def extract_url_from_cell(url_cell):
+def extract_url_from_cell(url_cell, hyperlink=None):
     """
-    Извлекает URL из ячейки Excel, обрабатывая гиперссылки и обычные значения
+    Извлекает URL из ячейки Excel, обрабатывая гиперссылки и обычные значения.
+    hyperlink - цель гиперссылки ячейки (для read_only книг, где cell.hyperlink недоступен)
     """
     # Приоритет 1: Гиперссылка в ячейке (если это внешняя ссылка)
-    if url_cell.hyperlink:
-        url = url_cell.hyperlink.target
-        # Игнорирование внутренние ссылки Excel (начинающиеся с '#')
-        if url and not url.startswith('#'):
-            return url
+    if hyperlink is None and getattr(url_cell, 'hyperlink', None):
+        hyperlink = url_cell.hyperlink.target
+    # Игнорирование внутренние ссылки Excel (начинающиеся с '#')
+    if hyperlink and not hyperlink.startswith('#'):
+        return hyperlink
     
     # Приоритет 2: Значение ячейки (если это строка с URL)
     cell_value = url_cell.value
@@ -15,4 +16,4 @@ def extract_url_from_cell(url_cell):
         return cell_value
     
     # Приоритет 3: Любое другое значение (преобразуется в строку)
-    return str(cell_value) if cell_value else None
\ No newline at end of file
+    return str(cell_value) if cell_value else None
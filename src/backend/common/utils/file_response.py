@@ -0,0 +1,98 @@
+import os
+import re
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def make_etag(stat):
+    return quote_etag(f"{int(stat.st_mtime):x}-{stat.st_size:x}")
+
+
+def _read_range(filepath, start, end, block_size=64 * 1024):
+    '''Генератор чтения файла в диапазоне [start, end]'''
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = f.read(min(block_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def _parse_range(header, size):
+    '''
+    Разбор одиночного диапазона "bytes=start-end".
+    None - заголовок игнорируется и отдается весь файл (несколько диапазонов, другие единицы,
+    некорректный синтаксис - RFC 9110, 14.2), RangeNotSatisfiable - диапазон вне файла (416)
+    '''
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Суффикс: последние N байт
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def serve_file(request, filepath, filename, content_type, x_accel_location=None):
+    '''
+    Отдача файла без чтения его в память.
+    Если задан x_accel_location - отдачу выполняет nginx (X-Accel-Redirect),
+    иначе FileResponse с поддержкой ETag/If-None-Match и Range/If-Range
+    '''
+    disposition = f'attachment; filename="{filename}"'
+
+    if x_accel_location:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = x_accel_location
+        response['Content-Disposition'] = disposition
+        return response
+
+    stat = os.stat(filepath)
+    etag = make_etag(stat)
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(filepath, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(open(filepath, 'rb'), content_type=content_type)
+        response['Content-Length'] = stat.st_size
+
+    response['Content-Disposition'] = disposition
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,51 @@
+import re
+import json
+
+
+# Пробелы и запятые между элементами массива
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_json_array(file, buffer_size=1 << 20):
+    '''
+    Потоковый разбор JSON-массива верхнего уровня: элементы отдаются по одному,
+    в памяти только буфер чтения (аналог ijson.items(file, 'item') без зависимостей)
+    '''
+    decoder = json.JSONDecoder()
+    buffer = file.read(buffer_size)
+    position = SEPARATORS.match(buffer).end()
+    if buffer[position:position + 1] != '[':
+        raise ValueError('Ожидается JSON-массив')
+    position += 1
+
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position >= len(buffer):
+            chunk = file.read(buffer_size)
+            if not chunk:
+                raise ValueError('Неожиданный конец JSON')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        if buffer[position] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Элемент обрезан концом буфера - дочитываем
+            chunk = file.read(buffer_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        if end == len(buffer):
+            # Число в конце буфера могло быть обрезано (123|45)
+            chunk = file.read(buffer_size)
+            if chunk:
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+
+        yield item
+        position = end
+        if position > buffer_size:
+            buffer, position = buffer[position:], 0
@@ -0,0 +1,66 @@
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, quote
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'ftp': 21}
+
+# Символы, которые можно не кодировать (RFC 3986, unreserved)
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+# Зарезервированные символы сохраняют смысл, поэтому не кодируются и не раскодируются
+RESERVED = ":/?#[]@!$&'()*+,;="
+
+PERCENT_ENCODED = re.compile(r'%([0-9A-Fa-f]{2})')
+
+
+def _normalize_component(value):
+    """Единое %-кодирование: unreserved раскодируются, остальное - %XX в верхнем регистре"""
+    def fix(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in UNRESERVED else f'%{match.group(1).upper()}'
+    return quote(PERCENT_ENCODED.sub(fix, value), safe=RESERVED + '%')
+
+
+def normalize_url(url):
+    """
+    Нормализованный URL для поиска дублей:
+    схема и хост в нижнем регистре, без порта по умолчанию, пустой путь -> '/',
+    единое %-кодирование (https://Example.com:443/а и https://example.com/%D0%B0 совпадают).
+    URL, который не разбирается (http://[::1), возвращается как есть без пробелов по краям
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.rpartition('@')[2].lower()
+    try:
+        host, port = parts.hostname or '', parts.port
+        if ':' in host:
+            host = f'[{host}]'
+        if port is None or DEFAULT_PORTS.get(scheme) == port:
+            netloc = host
+        else:
+            netloc = f'{host}:{port}'
+    except ValueError:
+        pass
+    if '@' in parts.netloc:
+        netloc = f"{parts.netloc.rpartition('@')[0]}@{netloc}"
+    return urlunsplit((
+        scheme,
+        netloc,
+        _normalize_component(parts.path) or '/',
+        _normalize_component(parts.query),
+        _normalize_component(parts.fragment),
+    ))
+
+
+def normalized_url_hash(normalized_url):
+    """64-битный хэш уже нормализованного URL (для индекса вместо btree по длинному url)"""
+    digest = hashlib.blake2b(normalized_url.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def url_hash(url):
+    return normalized_url_hash(normalize_url(url))
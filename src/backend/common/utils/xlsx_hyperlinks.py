@@ -0,0 +1,35 @@
+from xml.etree.ElementTree import iterparse
+from openpyxl.packaging.relationship import get_rels_path, get_dependents
+from openpyxl.utils.cell import range_boundaries, get_column_letter
+from openpyxl.xml.constants import SHEET_MAIN_NS, REL_NS
+
+
+def read_sheet_hyperlinks(sheet):
+    '''
+    Гиперссылки листа в режиме read_only ({"A2": "https://..."}).
+    В read_only openpyxl не отдает cell.hyperlink, поэтому
+    потоково читаем <hyperlinks> из xml листа
+    '''
+    archive = sheet.parent._archive
+    sheet_path = sheet._worksheet_path
+    rels_path = get_rels_path(sheet_path)
+    rels = get_dependents(archive, rels_path).to_dict() if rels_path in archive.namelist() else {}
+
+    hyperlinks = {}
+    with archive.open(sheet_path) as source:
+        for _, element in iterparse(source):
+            if element.tag == f'{{{SHEET_MAIN_NS}}}hyperlink':
+                rel = rels.get(element.get(f'{{{REL_NS}}}id'))
+                if rel is not None:
+                    target = rel.Target
+                else:
+                    # Внутренняя ссылка Excel
+                    target = f"#{element.get('location', '')}"
+                min_col, min_row, max_col, max_row = range_boundaries(element.get('ref'))
+                for row in range(min_row, max_row + 1):
+                    for col in range(min_col, max_col + 1):
+                        hyperlinks[f'{get_column_letter(col)}{row}'] = target
+            elif element.tag == f'{{{SHEET_MAIN_NS}}}row':
+                # Строки с данными не нужны, освобождаем память
+                element.clear()
+    return hyperlinks
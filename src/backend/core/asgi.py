@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Поток прогресса импорта и экспорта (SSE) без Django и без занятого воркера на клиента
+if settings.PROGRESS_STREAM['ENABLED']:
+    from shortener.progress_stream import build_progress_stream_app
+    application = build_progress_stream_app(application)
+
+# Редиректы по короткому коду обрабатываются до Django (uvicorn core.asgi:application)
+if settings.ASYNC_REDIRECT['ENABLED']:
+    from shortener.async_redirect import build_redirect_app
+    application = build_redirect_app(application)
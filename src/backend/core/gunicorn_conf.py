@@ -0,0 +1,43 @@
+"""
+Настройки gunicorn для прода, профиль выбирается переменной SERVER_MODE:
+wsgi - core.wsgi на потоковых воркерах (gthread), asgi - core.asgi на воркерах uvicorn.
+Запуск: gunicorn core.wsgi:application -c core/gunicorn_conf.py
+"""
+import multiprocessing
+from os import environ
+
+
+server_mode = environ.get('SERVER_MODE', 'wsgi')
+
+bind = environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+if server_mode == 'asgi':
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    # У каждого потока свое постоянное соединение с БД: workers * threads <= max_connections
+    worker_class = 'gthread'
+    threads = int(environ.get('GUNICORN_THREADS', 4))
+
+timeout = int(environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Перезапуск воркеров от утечек памяти, со сдвигом, чтобы не перезапускались одновременно
+max_requests = int(environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+# Приложение импортируется один раз в мастере, воркеры получают его через fork
+preload_app = True
+# Heartbeat воркеров в памяти, а не на диске контейнера
+worker_tmp_dir = '/dev/shm'
+
+accesslog = environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Соединения, открытые в мастере при импорте, не должны делиться между процессами
+    from django.db import connections
+    connections.close_all()
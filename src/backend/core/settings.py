@@ -76,12 +76,68 @@ DATABASES = {
         'PASSWORD': environ.get('POSTGRES_PASSWORD', 123),
         'HOST': environ.get('POSTGRES_HOST', 'postgres_url_shortener'),
         'PORT': environ.get('POSTGRES_PORT', '5432'),
+        # Постоянные соединения (0 - новое соединение на каждый запрос),
+        # перед повторным использованием соединение проверяется
+        'CONN_MAX_AGE': int(environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
         'TEST': {
             'NAME': 'test_url_shortener',
         },
     }
 }
 
+# Кэш
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Общий кэш ссылок для редиректа (в проде -> redis/memcached через env)
+    'links': {
+        'BACKEND': environ.get('LINK_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': environ.get('LINK_CACHE_LOCATION', 'links'),
+    },
+}
+
+LINK_CACHE = {
+    'LOCAL_MAXSIZE': int(environ.get('LINK_CACHE_LOCAL_MAXSIZE', 10000)),
+    'LOCAL_TTL': int(environ.get('LINK_CACHE_LOCAL_TTL', 60)),
+    'SHARED_ALIAS': 'links',
+    'SHARED_TTL': int(environ.get('LINK_CACHE_SHARED_TTL', 3600)),
+    'NEGATIVE_TTL': int(environ.get('LINK_CACHE_NEGATIVE_TTL', 10)),
+}
+
+# Учет переходов (буфер в памяти процесса, сбрасывается в БД фоновым потоком)
+CLICK_TRACKING = {
+    'ENABLED': environ.get('CLICK_TRACKING_ENABLED', 'true').lower() == 'true',
+    'BUFFER_SIZE': int(environ.get('CLICK_TRACKING_BUFFER_SIZE', 100000)),
+    'FLUSH_INTERVAL': float(environ.get('CLICK_TRACKING_FLUSH_INTERVAL', 5)),
+    'FLUSH_BATCH': int(environ.get('CLICK_TRACKING_FLUSH_BATCH', 5000)),
+    # Сколько дней хранятся сырые переходы (Click), дневные счетчики хранятся всегда
+    'RETENTION_DAYS': int(environ.get('CLICK_TRACKING_RETENTION_DAYS', 90)),
+}
+
+# Асинхронный редирект в ASGI (core.asgi): /<code> обслуживается без Django через пул asyncpg
+ASYNC_REDIRECT = {
+    'ENABLED': environ.get('ASYNC_REDIRECT_ENABLED', 'true').lower() == 'true',
+    'POOL_MIN_SIZE': int(environ.get('ASYNC_REDIRECT_POOL_MIN_SIZE', 1)),
+    'POOL_MAX_SIZE': int(environ.get('ASYNC_REDIRECT_POOL_MAX_SIZE', 10)),
+    # Локальный кэш сервиса редиректа: инвалидация до него не доходит, это окно устаревания ссылок
+    'LOCAL_TTL': int(environ.get('ASYNC_REDIRECT_LOCAL_TTL', 5)),
+}
+
+# Дедупликация по нормализованному url по умолчанию (в запросах включается параметром dedup)
+LINK_DEDUP = environ.get('LINK_DEDUP', 'false').lower() == 'true'
+
+# Максимум ссылок в одном запросе пакетного создания (create/batch/)
+LINK_BATCH_MAX_SIZE = int(environ.get('LINK_BATCH_MAX_SIZE', 10000))
+
+# Аллокатор коротких кодов
+SHORT_CODE = {
+    'ALLOCATOR': environ.get('SHORT_CODE_ALLOCATOR', 'shortener.code_allocator.FeistelCodeAllocator'),
+    'LENGTH': int(environ.get('SHORT_CODE_LENGTH', 6)),
+    'BLOCK_SIZE': int(environ.get('SHORT_CODE_BLOCK_SIZE', 1000)),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -149,6 +205,40 @@ STATIC_ROOT = '/app/static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/app/media'
 
+# Кэш QR-кодов (контентно-адресуемый, с ограничением по размеру).
+# Вне MEDIA_ROOT: по файлам кэша можно собрать все короткие ссылки
+QR_CACHE = {
+    'ROOT': environ.get('QR_CACHE_ROOT', '/app/data/qr_cache'),
+    'MAX_BYTES': int(environ.get('QR_CACHE_MAX_BYTES', 2 * 1024 ** 3)),
+    # Файлы, использованные недавно, не вытесняются (их может читать экспорт)
+    'EVICT_MIN_AGE_SECONDS': int(environ.get('QR_CACHE_EVICT_MIN_AGE_SECONDS', 600)),
+}
+
+# Прогресс фоновых задач: пишут воркеры Celery, читает backend (общий том media,
+# в проде -> redis/memcached через env), вместо update_state через брокер
+CACHES['progress'] = {
+    'BACKEND': environ.get('PROGRESS_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+    'LOCATION': environ.get('PROGRESS_CACHE_LOCATION', os.path.join(MEDIA_ROOT, 'progress')),
+}
+
+TASK_PROGRESS = {
+    'ALIAS': 'progress',
+    # Запись не чаще раза в INTERVAL секунд или при изменении на MIN_DELTA процентов
+    'INTERVAL': float(environ.get('TASK_PROGRESS_INTERVAL', 1)),
+    'MIN_DELTA': float(environ.get('TASK_PROGRESS_MIN_DELTA', 5)),
+    'TTL': int(environ.get('TASK_PROGRESS_TTL', 24 * 60 * 60)),
+}
+
+# Поток прогресса задач (SSE) в ASGI-сервисе: /api/shortener/progress/<task_id>/stream/
+PROGRESS_STREAM = {
+    'ENABLED': environ.get('PROGRESS_STREAM_ENABLED', 'true').lower() == 'true',
+    # Как часто читается кэш progress (один раз на задачу для всех слушателей)
+    'POLL_INTERVAL': float(environ.get('PROGRESS_STREAM_POLL_INTERVAL', 0.5)),
+    'HEARTBEAT': float(environ.get('PROGRESS_STREAM_HEARTBEAT', 15)),
+    # Поток закрывается через TIMEOUT секунд, EventSource переподключается сам
+    'TIMEOUT': float(environ.get('PROGRESS_STREAM_TIMEOUT', 600)),
+}
+
 
 
 # RabbitMQ
@@ -166,6 +256,48 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_IGNORE_RESULT = False
 CELERY_RESULT_EXPIRES = 3600
+CELERY_BEAT_SCHEDULE = {
+    'cleanup-export-files': {
+        'task': 'shortener.tasks.cleanup_export_files',
+        'schedule': 60 * 60,
+    },
+    'evict-qr-cache': {
+        'task': 'shortener.tasks.evict_qr_cache',
+        'schedule': 6 * 60 * 60,
+    },
+    'cleanup-finished-jobs': {
+        'task': 'shortener.tasks.cleanup_finished_jobs',
+        'schedule': 24 * 60 * 60,
+    },
+    'purge-old-clicks': {
+        'task': 'shortener.tasks.purge_old_clicks',
+        'schedule': 24 * 60 * 60,
+    },
+}
+
+# Сколько хранятся завершенные задачи импорта/экспорта (Job) и их ссылки
+JOB_TTL_SECONDS = int(environ.get('JOB_TTL_SECONDS', 7 * 24 * 60 * 60))
+
+# Отчеты об отклоненных строках импорта: вне MEDIA_ROOT, отдаются только через API
+# (общий том для воркеров Celery и backend)
+IMPORT_REPORTS_DIR = environ.get('IMPORT_REPORTS_DIR', '/app/data/import_reports')
+
+# Экспорт: отдача архивов через nginx (internal location, см. nginx.conf)
+EXPORT_X_ACCEL_REDIRECT = environ.get('EXPORT_X_ACCEL_REDIRECT', 'false').lower() == 'true'
+EXPORT_X_ACCEL_LOCATION = '/protected/exports/'
+
+# Экспорт: время жизни неиспользуемых архивов и общий лимит на диске
+EXPORT_TTL_SECONDS = int(environ.get('EXPORT_TTL_SECONDS', 24 * 60 * 60))
+EXPORT_MAX_BYTES = int(environ.get('EXPORT_MAX_BYTES', 10 * 1024 ** 3))
+
+# Экспорт: размер пачки ссылок для параллельного рендера QR-кодов
+EXPORT_QR_CHUNK_SIZE = int(environ.get('EXPORT_QR_CHUNK_SIZE', 500))
+
+# Дельта-экспорт: запас отметки since на транзакции, закоммиченные позже своего updated_at
+EXPORT_WATERMARK_LAG_SECONDS = int(environ.get('EXPORT_WATERMARK_LAG_SECONDS', 300))
+
+# Домен коротких ссылок
+DOMAIN_NAME = environ.get('DOMAIN_NAME')
 
 # Telegram
 TELEGRAM_BOT_TOKEN=environ.get('API_TELEGRAM_TOKEN')
\ No newline at end of file
@@ -30,9 +30,26 @@ if [ ! -f "$FLAG_FILE" ]; then
     # Загрузка фикстур
     ./manage.py loaddata fixtures/Link.json --app Link
 
+    # Заполнение массива тегов и хэша url для ссылок, загруженных без save()
+    python manage.py backfill_link_tags
+    python manage.py backfill_link_url_hash
+
     # Создание файл-флага, указывающий на то, что фикстуры были загружены
     touch $FLAG_FILE
 fi
 
-# Запуск сервера Django
-nohup python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Проверка окружения перед запуском (БД, миграции, кэш, MEDIA_ROOT)
+python manage.py startup_check || exit 1
+
+# Запуск сервера Django, профиль задается SERVER_MODE (настройки gunicorn - core/gunicorn_conf.py)
+case "$SERVER_MODE" in
+    wsgi)
+        exec gunicorn core.wsgi:application -c core/gunicorn_conf.py
+        ;;
+    asgi)
+        exec gunicorn core.asgi:application -c core/gunicorn_conf.py
+        ;;
+    *)
+        exec python manage.py runserver 0.0.0.0:8000
+        ;;
+esac
\ No newline at end of file
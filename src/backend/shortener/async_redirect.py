@@ -0,0 +1,168 @@
+import json
+import asyncio
+import logging
+import asyncpg
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.encoding import iri_to_uri
+from .cache import link_cache, LinkCache, LocalLRUCache, NOT_FOUND
+from .clicks import click_buffer
+from .url_templates import resolve_url
+
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_SCHEMES = ('http', 'https', 'ftp')
+
+
+class AsyncLinkLoader:
+    """
+    Загрузка URL по коду через пул соединений asyncpg.
+    Пул создается лениво в event loop-е воркера (у каждого процесса uvicorn свой)
+    """
+
+    def __init__(self, database, min_size=1, max_size=10):
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._pool_lock = None
+
+    async def get_pool(self):
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        host=self.database['HOST'] or None,
+                        port=self.database['PORT'] or None,
+                        user=self.database['USER'],
+                        password=str(self.database['PASSWORD']) or None,
+                        database=self.database['NAME'],
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                    )
+        return self._pool
+
+    async def __call__(self, code):
+        """Адрес редиректа (ссылки с шаблоном рендерятся, как в load_link_url)"""
+        pool = await self.get_pool()
+        row = await pool.fetchrow(
+            'SELECT l.url, t.url_template, l.template_fields FROM shortener_link l '
+            'LEFT JOIN shortener_template t ON t.id = l.template_id WHERE l.code = $1',
+            code
+        )
+        if row is None:
+            return None
+        template_fields = json.loads(row['template_fields']) if row['template_fields'] else None
+        return resolve_url(row['url'], row['url_template'], template_fields)
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+class RedirectASGIApp:
+    """
+    ASGI-приложение перед Django: GET/HEAD /<code> обслуживаются без Django
+    (локальный кэш процесса -> общий кэш link_cache -> asyncpg), все остальное - в Django.
+    Неизвестные коды тоже передаются в Django, чтобы 404 отдавался как раньше.
+    Сигналы инвалидации срабатывают в процессах Django/Celery и очищают только общий кэш,
+    поэтому удаленная или выключенная ссылка редиректит еще до cache.ttl секунд
+    (ASYNC_REDIRECT['LOCAL_TTL']) - локальный кэш здесь короткий
+    """
+
+    def __init__(self, app, loader, cache=None, shared=None,
+                 shared_ttl=link_cache.shared_ttl, negative_ttl=link_cache.negative_ttl):
+        self.app = app
+        self.loader = loader
+        self.cache = cache if cache is not None else LocalLRUCache()
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+        # Одновременные промахи по одному коду ждут один запрос к БД
+        self._pending = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            code = self.match_code(scope)
+            if code is not None:
+                url = await self.get_url(code)
+                if url is not None and urlsplit(url).scheme in ALLOWED_SCHEMES:
+                    if settings.CLICK_TRACKING['ENABLED']:
+                        click_buffer.record(code)
+                    return await self.redirect(send, url)
+        return await self.app(scope, receive, send)
+
+    @staticmethod
+    def match_code(scope):
+        """Код из пути вида /<code> (как path('<str:code>') в core.urls)"""
+        path = scope['path'][len(scope.get('root_path', '')):]
+        code = path[1:]
+        if not code or '/' in code:
+            return None
+        return code
+
+    async def get_url(self, code):
+        value = self.cache.get(code)
+        if value is None:
+            task = self._pending.get(code)
+            if task is None:
+                task = asyncio.ensure_future(self.load(code))
+                self._pending[code] = task
+                task.add_done_callback(lambda _: self._pending.pop(code, None))
+            value = await asyncio.shield(task)
+        return None if value == NOT_FOUND else value
+
+    async def load(self, code):
+        key = LinkCache.make_key(code)
+        value = await self.shared.aget(key) if self.shared is not None else None
+        if value is None:
+            value = await self.loader(code) or NOT_FOUND
+            if self.shared is not None:
+                await self.shared.aset(key, value, self.negative_ttl if value == NOT_FOUND else self.shared_ttl)
+        self.cache.set(code, value, min(self.negative_ttl, self.cache.ttl) if value == NOT_FOUND else None)
+        return value
+
+    @staticmethod
+    async def redirect(send, url):
+        await send({
+            'type': 'http.response.start',
+            'status': 302,
+            'headers': [
+                (b'location', iri_to_uri(url).encode('latin-1')),
+                (b'content-type', b'text/html; charset=utf-8'),
+                (b'content-length', b'0'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        # Django не поддерживает lifespan, поэтому он обрабатывается здесь
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.loader.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def build_redirect_app(app):
+    shared = link_cache.shared
+    # LocMemCache - память этого процесса: инвалидация из других процессов до него не доходит
+    if isinstance(shared, LocMemCache):
+        shared = None
+    loader = AsyncLinkLoader(
+        settings.DATABASES['default'],
+        min_size=settings.ASYNC_REDIRECT['POOL_MIN_SIZE'],
+        max_size=settings.ASYNC_REDIRECT['POOL_MAX_SIZE'],
+    )
+    cache = LocalLRUCache(maxsize=settings.LINK_CACHE['LOCAL_MAXSIZE'], ttl=settings.ASYNC_REDIRECT['LOCAL_TTL'])
+    return RedirectASGIApp(app, loader, cache=cache, shared=shared)
@@ -0,0 +1,182 @@
+import io
+import csv
+import json
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Link
+from .cache import link_cache
+from .code_allocator import get_code_allocator
+from .tags import split_tags
+from .dedup import find_existing_codes
+from common.utils.normalize_url import normalize_url, url_hash
+
+
+# Колонки, которые заполняются загрузчиком (id выдает БД)
+LINK_COLUMNS = (
+    'url', 'url_hash', 'name', 'code', 'is_active', 'description',
+    'tags', 'tag_list', 'created_at', 'updated_at', 'template_fields', 'template_id',
+)
+
+COPY_NULL = '\\N'
+TAG_LIST_INDEX = LINK_COLUMNS.index('tag_list')
+
+
+def prepare_rows(rows):
+    """
+    Дополнение строк значениями по умолчанию.
+    Коды для строк без кода выдаются аллокатором одной пачкой
+    """
+    rows = [dict(row) for row in rows]
+    without_code = [row for row in rows if not row.get('code')]
+    if without_code:
+        for row, code in zip(without_code, get_code_allocator().allocate(len(without_code))):
+            row['code'] = code
+    now = timezone.now()
+    for row in rows:
+        row.setdefault('created_at', now)
+        row.setdefault('updated_at', now)
+        row.setdefault('is_active', True)
+        row['tag_list'] = split_tags(row.get('tags'))
+        row['url_hash'] = url_hash(row['url']) if row.get('url') else None
+        if 'template' in row:
+            template = row.pop('template')
+            row['template_id'] = getattr(template, 'pk', template)
+    return rows
+
+
+def _to_copy_value(value):
+    if type(value) is str:
+        return value
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _to_copy_array(values):
+    """Список строк -> литерал массива Postgres ({"a","b"})"""
+    items = (value.replace('\\', '\\\\').replace('"', '\\"') for value in values)
+    return '{' + ','.join(f'"{item}"' for item in items) + '}'
+
+
+def _copy_chunk(cursor, table, staging, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = [_to_copy_value(row.get(column)) for column in LINK_COLUMNS]
+        values[TAG_LIST_INDEX] = _to_copy_array(row['tag_list'])
+        writer.writerow(values)
+    buffer.seek(0)
+
+    columns = ', '.join(LINK_COLUMNS)
+    cursor.execute(f'TRUNCATE {staging}')
+    cursor.copy_expert(
+        f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer
+    )
+    cursor.execute(
+        f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} '
+        f'ON CONFLICT (code) DO NOTHING RETURNING code'
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def copy_insert_links(rows, chunk_size=50000):
+    """
+    Массовая вставка ссылок через COPY FROM STDIN во временную таблицу
+    и INSERT ... ON CONFLICT (code) DO NOTHING в shortener_link.
+    rows - итерируемое словарей с полями LINK_COLUMNS (code можно не указывать).
+    Возвращает (подготовленные строки, множество реально вставленных кодов)
+    """
+    rows = prepare_rows(rows)
+    if not rows:
+        return rows, set()
+
+    if connection.vendor != 'postgresql':
+        return rows, _bulk_create_fallback(rows, chunk_size)
+
+    table = connection.ops.quote_name(Link._meta.db_table)
+    staging = 'link_copy_staging'
+    inserted = set()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Колонки копируются без NOT NULL/UNIQUE, проверки делает основная таблица
+        cursor.execute(
+            f'CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS '
+            f'SELECT {", ".join(LINK_COLUMNS)} FROM {table} WITH NO DATA'
+        )
+        for start in range(0, len(rows), chunk_size):
+            inserted.update(_copy_chunk(cursor, table, staging, rows[start:start + chunk_size]))
+
+    link_cache.invalidate_many(inserted)
+    return rows, inserted
+
+
+def _bulk_create_fallback(rows, chunk_size):
+    """Вставка через ORM для БД без COPY (например, sqlite в тестах)"""
+    codes = [row['code'] for row in rows]
+    existing = set(Link.objects.filter(code__in=codes).values_list('code', flat=True))
+    links = [
+        Link(**{column: row.get(column) for column in LINK_COLUMNS})
+        for row in rows if row['code'] not in existing
+    ]
+    Link.objects.bulk_create(links, batch_size=chunk_size, ignore_conflicts=True)
+    inserted = {link.code for link in links}
+    link_cache.invalidate_many(inserted)
+    return inserted
+
+
+def create_links(rows, dedup=False, attempts=3):
+    """
+    Создание ссылок одной массовой вставкой, коды выдает аллокатор.
+    dedup - для url, которые уже есть в БД (или повторяются в пачке), ссылка не создается,
+    а берется код существующей (row['existing'] = True); строки с шаблоном создаются всегда.
+    Возвращает подготовленные строки в исходном порядке
+    """
+    rows = [dict(row) for row in rows]
+    new_rows = rows
+    if dedup:
+        new_rows = []
+        keys = [normalize_url(row['url']) for row in rows]
+        existing = find_existing_codes(keys)
+        first_rows = {}
+        for key, row in zip(keys, rows):
+            if row.get('template') is not None or row.get('template_id') is not None:
+                # Ссылка с шаблоном ведет не на url - дублем не считается
+                new_rows.append(row)
+            elif key in existing:
+                row['code'] = existing[key]
+                row['existing'] = True
+            elif key in first_rows:
+                row['existing'] = True
+                row['same_as'] = first_rows[key]
+            else:
+                first_rows[key] = row
+                new_rows.append(row)
+
+    for row, prepared in zip(new_rows, _insert_new_links(new_rows, attempts)):
+        row.update(prepared, existing=False)
+    for row in rows:
+        if 'same_as' in row:
+            row['code'] = row.pop('same_as')['code']
+    return rows
+
+
+def _insert_new_links(rows, attempts):
+    """Вставка с повтором для строк, чей код успели занять"""
+    rows, inserted = copy_insert_links(rows)
+    pending = [index for index, row in enumerate(rows) if row['code'] not in inserted]
+    for _ in range(attempts):
+        if not pending:
+            return rows
+        retry_rows, inserted = copy_insert_links([{**rows[index], 'code': None} for index in pending])
+        for index, row in zip(pending, retry_rows):
+            rows[index] = row
+        pending = [index for index in pending if rows[index]['code'] not in inserted]
+    if pending:
+        raise RuntimeError(f"Не удалось выдать коды для {len(pending)} ссылок")
+    return rows
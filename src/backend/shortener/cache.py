@@ -0,0 +1,145 @@
+import time
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Маркер отсутствующего кода (негативное кэширование)
+NOT_FOUND = '__not_found__'
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """Ограниченный LRU-кэш с TTL в памяти процесса"""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LinkCache:
+    """
+    Двухуровневый кэш code -> url для редиректов:
+    локальный LRU процесса + общий кэш Django (CACHES[SHARED_ALIAS])
+    """
+
+    def __init__(self, loader, local_maxsize=10000, local_ttl=60,
+                 shared_alias=None, shared_ttl=3600, negative_ttl=10):
+        self.loader = loader
+        self.local = LocalLRUCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.shared_alias = shared_alias
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+
+    @property
+    def shared(self):
+        if not self.shared_alias:
+            return None
+        return caches[self.shared_alias]
+
+    @staticmethod
+    def make_key(code):
+        return f'link:{code}'
+
+    def get_url(self, code):
+        """Возвращает URL по коду или None, если ссылки нет"""
+        value = self.local.get(code)
+        if value is None:
+            value = self._get_shared(code)
+            if value is None:
+                value = self.loader(code) or NOT_FOUND
+                self._set_shared(code, value)
+            self._set_local(code, value)
+        return None if value == NOT_FOUND else value
+
+    def invalidate(self, code):
+        self.local.delete(code)
+        if self.shared is not None:
+            self.shared.delete(self.make_key(code))
+
+    def invalidate_many(self, codes):
+        codes = list(codes)
+        for code in codes:
+            self.local.delete(code)
+        if self.shared is not None and codes:
+            self.shared.delete_many([self.make_key(code) for code in codes])
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def _get_shared(self, code):
+        if self.shared is None:
+            return None
+        return self.shared.get(self.make_key(code))
+
+    def _set_shared(self, code, value):
+        if self.shared is None:
+            return
+        ttl = self.negative_ttl if value == NOT_FOUND else self.shared_ttl
+        self.shared.set(self.make_key(code), value, ttl)
+
+    def _set_local(self, code, value):
+        ttl = self.negative_ttl if value == NOT_FOUND else None
+        self.local.set(code, value, ttl)
+
+
+def load_link_url(code):
+    """
+    Загрузка адреса редиректа из БД одним легким запросом.
+    Для ссылок с шаблоном адрес рендерится здесь, в кэш попадает уже готовый URL
+    """
+    from .models import Link
+    from .url_templates import resolve_url
+    row = Link.objects.filter(code=code).values_list('url', 'template__url_template', 'template_fields').first()
+    if row is None:
+        return None
+    return resolve_url(*row)
+
+
+_link_cache_settings = getattr(settings, 'LINK_CACHE', {})
+
+link_cache = LinkCache(
+    loader=load_link_url,
+    local_maxsize=_link_cache_settings.get('LOCAL_MAXSIZE', 10000),
+    local_ttl=_link_cache_settings.get('LOCAL_TTL', 60),
+    shared_alias=_link_cache_settings.get('SHARED_ALIAS'),
+    shared_ttl=_link_cache_settings.get('SHARED_TTL', 3600),
+    negative_ttl=_link_cache_settings.get('NEGATIVE_TTL', 10),
+)
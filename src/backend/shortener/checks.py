@@ -0,0 +1,42 @@
+import os
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Warning, Tags, register
+from django.db import connections
+
+
+@register(Tags.database)
+def check_database(app_configs, databases=None, **kwargs):
+    """Соединение с БД (только check --database и migrate)"""
+    errors = []
+    for alias in databases or []:
+        try:
+            connections[alias].ensure_connection()
+        except Exception as e:
+            errors.append(Error(f'Нет соединения с БД {alias}: {e}', id='shortener.E001'))
+    return errors
+
+
+@register(Tags.caches)
+def check_link_cache(app_configs, **kwargs):
+    """Общий кэш ссылок доступен на запись и чтение"""
+    alias = settings.LINK_CACHE.get('SHARED_ALIAS')
+    if not alias:
+        return []
+    try:
+        cache = caches[alias]
+        cache.set('link:__check__', 'ok', 10)
+        if cache.get('link:__check__') != 'ok':
+            raise ValueError('значение не прочитано')
+    except Exception as e:
+        return [Error(f'Кэш ссылок {alias} недоступен: {e}', id='shortener.E004')]
+    return []
+
+
+@register()
+def check_media_root(app_configs, **kwargs):
+    """MEDIA_ROOT доступен на запись (импорт, экспорт, кэш QR-кодов)"""
+    if not os.path.isdir(settings.MEDIA_ROOT) or not os.access(settings.MEDIA_ROOT, os.W_OK):
+        return [Warning(f'MEDIA_ROOT {settings.MEDIA_ROOT} не существует или недоступен на запись',
+                        id='shortener.W001')]
+    return []
@@ -0,0 +1,120 @@
+import os
+import atexit
+import logging
+import threading
+from datetime import timedelta
+from collections import deque, Counter
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def save_clicks(events):
+    """
+    Запись пачки переходов: сырые события одним bulk insert
+    и инкремент дневных счетчиков (upsert по (code, day))
+    """
+    from .models import Click, LinkDailyClicks
+    rollup = Counter((code, timezone.localdate(clicked_at)) for code, clicked_at in events)
+    table = connection.ops.quote_name(LinkDailyClicks._meta.db_table)
+    with transaction.atomic():
+        Click.objects.bulk_create(
+            [Click(code=code, clicked_at=clicked_at) for code, clicked_at in events],
+            batch_size=5000
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (code, day, clicks) VALUES (%s, %s, %s) '
+                f'ON CONFLICT (code, day) DO UPDATE SET clicks = {table}.clicks + EXCLUDED.clicks',
+                [(code, day, clicks) for (code, day), clicks in rollup.items()]
+            )
+
+
+def purge_clicks(retention_days, batch_size=50000):
+    """
+    Удаление сырых переходов старше retention_days пачками по batch_size (короткие транзакции).
+    Дневные счетчики пополняются в одной транзакции с записью переходов, поэтому удаляемое уже учтено.
+    Возвращает количество удаленных
+    """
+    from .models import Click
+    border = timezone.now() - timedelta(days=retention_days)
+    removed = 0
+    while True:
+        ids = list(Click.objects.filter(clicked_at__lt=border).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += Click.objects.filter(pk__in=ids).delete()[0]
+
+
+class ClickBuffer:
+    """
+    Кольцевой буфер переходов в памяти процесса.
+    Редирект только добавляет событие (без запросов к БД), фоновый поток
+    периодически сбрасывает накопленное пачкой. При переполнении теряются самые старые события
+    """
+
+    def __init__(self, flush=save_clicks, maxlen=100000, flush_interval=5.0, flush_batch=5000):
+        self.flush_func = flush
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._events = deque(maxlen=maxlen)
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def record(self, code):
+        self._events.append((code, timezone.now()))
+        self._ensure_thread()
+        if len(self._events) >= self.flush_batch:
+            self._wakeup.set()
+
+    def flush(self):
+        """Сброс всех накопленных событий, возвращает количество записанных"""
+        with self._flush_lock:
+            flushed = 0
+            while self._events:
+                batch = []
+                while self._events and len(batch) < self.flush_batch:
+                    batch.append(self._events.popleft())
+                try:
+                    self.flush_func(batch)
+                except Exception:
+                    logger.exception(f"Не удалось записать {len(batch)} переходов")
+                    continue
+                flushed += len(batch)
+            return flushed
+
+    def _ensure_thread(self):
+        # Поток не переживает fork, поэтому проверяется pid
+        if self._pid == os.getpid():
+            return
+        with self._flush_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='click-buffer-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            connection.close()
+
+    def __len__(self):
+        return len(self._events)
+
+
+_click_settings = getattr(settings, 'CLICK_TRACKING', {})
+
+click_buffer = ClickBuffer(
+    maxlen=_click_settings.get('BUFFER_SIZE', 100000),
+    flush_interval=_click_settings.get('FLUSH_INTERVAL', 5.0),
+    flush_batch=_click_settings.get('FLUSH_BATCH', 5000),
+)
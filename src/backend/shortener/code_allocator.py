@@ -0,0 +1,149 @@
+import os
+import hashlib
+import string
+import threading
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+
+ALPHABET = string.digits + string.ascii_letters
+SEQUENCE_NAME = 'shortener_code_seq'
+
+
+def base62_encode(number, length):
+    """Перевод числа в base62 с дополнением до нужной длины"""
+    chars = []
+    while number:
+        number, rest = divmod(number, 62)
+        chars.append(ALPHABET[rest])
+    return ''.join(reversed(chars)).rjust(length, ALPHABET[0])
+
+
+def ensure_sequence(using=None):
+    """Создание последовательности для выдачи кодов (вызывается после migrate)"""
+    from django.db import connections
+    conn = connections[using] if using else connection
+    if conn.vendor != 'postgresql':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME}')
+
+
+def reserve_from_sequence(size):
+    """
+    Резервирование блока номеров одним запросом.
+    nextval не откатывается вместе с транзакцией, поэтому номера не выдаются дважды
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT nextval('{SEQUENCE_NAME}') FROM generate_series(1, %s)", [size])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_taken_codes(codes):
+    """Отсеивание кодов, уже занятых (например, импортированных со старого сервиса)"""
+    from .models import Link
+    taken = set(Link.objects.filter(code__in=codes).values_list('code', flat=True))
+    return [code for code in codes if code not in taken]
+
+
+class CodeAllocator:
+    """
+    Базовый аллокатор коротких кодов.
+    Номера резервируются блоками, коды выдаются из пула процесса без запросов к БД
+    """
+
+    def __init__(self, length=6, block_size=1000, reserve=reserve_from_sequence,
+                 check_taken=filter_taken_codes):
+        self.length = length
+        self.block_size = block_size
+        self.domain = 62 ** length
+        self.reserve = reserve
+        self.check_taken = check_taken
+        self._pool = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def encode(self, number):
+        raise NotImplementedError
+
+    def next_code(self):
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        """Выдача count уникальных кодов"""
+        with self._lock:
+            # После fork (prefork воркеры Celery) пул родителя использовать нельзя
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pool = []
+            while len(self._pool) < count:
+                self._refill(max(self.block_size, count - len(self._pool)))
+            codes = self._pool[:count]
+            del self._pool[:count]
+            return codes
+
+    def _refill(self, size):
+        numbers = self.reserve(size)
+        if numbers and numbers[-1] >= self.domain:
+            raise OverflowError(f"Закончилось пространство кодов длины {self.length}")
+        codes = [self.encode(number) for number in numbers]
+        self._pool.extend(self.check_taken(codes))
+
+
+class SequentialCodeAllocator(CodeAllocator):
+    """Коды - base62 от номера последовательности (предсказуемые)"""
+
+    def encode(self, number):
+        return base62_encode(number, self.length)
+
+
+class FeistelCodeAllocator(CodeAllocator):
+    """Коды - base62 от номера, переставленного сетью Фейстеля (неугадываемые)"""
+
+    rounds = 4
+
+    def __init__(self, *args, key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        key = (key if key is not None else settings.SECRET_KEY).encode()[:64]
+        bits = (self.domain - 1).bit_length()
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        # Хэшеры с ключом создаются один раз, на каждый раунд берется копия
+        self._round_hashers = [
+            hashlib.blake2b(digest_size=8, key=key, salt=round_num.to_bytes(16, 'big'))
+            for round_num in range(self.rounds)
+        ]
+
+    def permute(self, number):
+        """Биекция на [0, domain): Фейстель по 2*half_bits битам + cycle walking"""
+        half_bits, half_mask = self.half_bits, self.half_mask
+        while True:
+            left, right = number >> half_bits, number & half_mask
+            for hasher in self._round_hashers:
+                round_hash = hasher.copy()
+                round_hash.update(right.to_bytes(8, 'big'))
+                left, right = right, left ^ (int.from_bytes(round_hash.digest(), 'big') & half_mask)
+            number = (left << half_bits) | right
+            if number < self.domain:
+                return number
+
+    def encode(self, number):
+        return base62_encode(self.permute(number), self.length)
+
+
+_allocator = None
+
+
+def get_code_allocator():
+    global _allocator
+    if _allocator is None:
+        config = getattr(settings, 'SHORT_CODE', {})
+        allocator_class = import_string(
+            config.get('ALLOCATOR', 'shortener.code_allocator.FeistelCodeAllocator')
+        )
+        _allocator = allocator_class(
+            length=config.get('LENGTH', 6),
+            block_size=config.get('BLOCK_SIZE', 1000),
+        )
+    return _allocator
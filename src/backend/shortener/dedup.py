@@ -0,0 +1,30 @@
+from django.conf import settings
+from common.utils.normalize_url import normalize_url, normalized_url_hash
+from .models import Link
+
+
+def dedup_enabled(value=None):
+    """Режим дедупликации: из параметра запроса (true/false), без него - настройка LINK_DEDUP"""
+    if value is None or value == '':
+        return settings.LINK_DEDUP
+    return str(value).lower() in ('true', '1')
+
+
+def find_existing_codes(normalized_urls):
+    """
+    Коды существующих ссылок для нормализованных url одним IN запросом по индексу url_hash.
+    Совпадение хэша перепроверяется по url, из дублей берется самая старая ссылка.
+    Ссылки с шаблоном не учитываются: по ним открывается адрес из шаблона, а не url.
+    Возвращает {нормализованный url: код}
+    """
+    normalized_urls = set(normalized_urls)
+    if not normalized_urls:
+        return {}
+    hashes = {normalized_url_hash(url) for url in normalized_urls}
+    existing = {}
+    links = Link.objects.filter(url_hash__in=hashes, template__isnull=True).order_by('-id').values_list('url', 'code')
+    for url, code in links:
+        key = normalize_url(url)
+        if key in normalized_urls:
+            existing[key] = code
+    return existing
@@ -0,0 +1,135 @@
+import os
+import time
+import shutil
+import hashlib
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from .models import Link, ExportArchive
+from .tags import filter_by_tags
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_export_dir():
+    return os.path.join(settings.MEDIA_ROOT, 'exports')
+
+
+def export_queryset(since=None, tags_all=None, tags_any=None):
+    """
+    Ссылки для экспорта, при since - только новые и измененные (индекс по updated_at),
+    tags_all/tags_any - фильтр по тегам (см. filter_by_tags)
+    """
+    links = Link.objects.all()
+    if since is not None:
+        links = links.filter(updated_at__gte=since)
+    return filter_by_tags(links, tags_all, tags_any)
+
+
+def export_watermark():
+    """
+    Отметка since для следующего дельта-экспорта: последний updated_at в БД минус EXPORT_WATERMARK_LAG_SECONDS.
+    updated_at ставится в Python до коммита, и транзакция, закоммиченная позже, может нести
+    более раннее значение - запас покрывает транзакции короче lag (повтор ссылок в дельте безопасен).
+    None - ссылок нет, следующий экспорт полный
+    """
+    latest = Link.objects.aggregate(latest=Max('updated_at'))['latest']
+    if latest is None:
+        return None
+    return latest - timedelta(seconds=settings.EXPORT_WATERMARK_LAG_SECONDS)
+
+
+def links_version():
+    """Версия набора ссылок: меняется при добавлении, удалении и изменении ссылок"""
+    stats = Link.objects.aggregate(count=Count('id'), max_id=Max('id'), updated_at=Max('updated_at'))
+    updated_at = stats['updated_at'].isoformat() if stats['updated_at'] else ''
+    return f"{stats['count']}:{stats['max_id']}:{updated_at}"
+
+
+def export_fingerprint(base_url, generate_qr, since=None, tags_all=None, tags_any=None):
+    since = since.isoformat() if since else ''
+    tags = f"{','.join(sorted(tags_all or []))}|{','.join(sorted(tags_any or []))}"
+    raw = f"{links_version()}|{base_url}|{int(bool(generate_qr))}|{since}|{tags}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def find_archive(fingerprint):
+    """Готовый архив с таким же содержимым, если он еще лежит на диске"""
+    archive = ExportArchive.objects.filter(fingerprint=fingerprint).first()
+    if archive is None:
+        return None
+    if not os.path.exists(archive.file_path):
+        archive.delete()
+        return None
+    return archive
+
+
+def register_archive(fingerprint, task_id, filepath, filename):
+    archive, _ = ExportArchive.objects.update_or_create(
+        fingerprint=fingerprint,
+        defaults={
+            'task_id': task_id,
+            'file_path': filepath,
+            'filename': filename,
+            'file_size': os.path.getsize(filepath),
+            'last_accessed_at': timezone.now(),
+        }
+    )
+    return archive
+
+
+def touch_archive(archive):
+    ExportArchive.objects.filter(pk=archive.pk).update(last_accessed_at=timezone.now())
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def cleanup_exports(ttl_seconds, max_bytes):
+    """
+    Удаление архивов экспорта:
+    - зарегистрированных, к которым не обращались дольше ttl_seconds;
+    - самых давно использованных, пока общий размер больше max_bytes;
+    - незарегистрированных файлов и рабочих папок старше ttl_seconds
+    """
+    removed = 0
+    expired_before = timezone.now() - timedelta(seconds=ttl_seconds)
+    for archive in ExportArchive.objects.filter(last_accessed_at__lt=expired_before):
+        _remove_file(archive.file_path)
+        archive.delete()
+        removed += 1
+
+    total = 0
+    for archive in ExportArchive.objects.order_by('-last_accessed_at'):
+        total += archive.file_size
+        if total > max_bytes:
+            _remove_file(archive.file_path)
+            archive.delete()
+            removed += 1
+
+    export_dir = get_export_dir()
+    if not os.path.isdir(export_dir):
+        return removed
+    registered = set(ExportArchive.objects.values_list('file_path', flat=True))
+    tmp_dir = os.path.join(export_dir, 'tmp')
+    expired_mtime = time.time() - ttl_seconds
+    for entry in os.scandir(export_dir):
+        if entry.path == tmp_dir or entry.path in registered:
+            continue
+        if entry.is_file() and entry.stat().st_mtime < expired_mtime:
+            _remove_file(entry.path)
+            removed += 1
+    if os.path.isdir(tmp_dir):
+        # Рабочие папки упавших экспортов
+        for entry in os.scandir(tmp_dir):
+            if entry.stat().st_mtime < expired_mtime:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+    return removed
@@ -0,0 +1,97 @@
+import os
+import re
+import csv
+from urllib.parse import quote
+from common.utils.normalize_url import RESERVED
+
+
+URL_MAX_LENGTH = 2048
+REPORT_COLUMNS = ['row', 'url', 'description', 'error']
+
+SCHEME = r'(?i)^https?://'
+# Все, что до пути: схема и хост
+HEAD = r'^[^:/?#]*://[^/?#]*'
+# Метка домена: латиница, цифры, дефис и любые не-ASCII символы (пример.рф)
+LABEL = r'[^\x00-\x2c\x2e\x2f\x3a-\x40\x5b-\x60\x7b-\x7f]+'
+HOST = rf'(?i)^https?://(?:(?:{LABEL}\.)+{LABEL}|localhost|\d{{1,3}}(?:\.\d{{1,3}}){{3}})(?::\d{{1,5}})?(?:[/?#]|$)'
+# Символы, которые в url допустимы без %-кодирования
+NEEDS_QUOTING = r"[^A-Za-z0-9\-._~:/?#\[\]@!$&'()*+,;=%]"
+CONTROL_CHARS = r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]'
+# % без двух шестнадцатеричных цифр после него
+BAD_PERCENT = r'%(?![0-9A-Fa-f]{2})'
+
+_scheme = re.compile(SCHEME)
+_host = re.compile(HOST)
+_head = re.compile(HEAD)
+_needs_quoting = re.compile(NEEDS_QUOTING)
+_control_chars = re.compile(CONTROL_CHARS)
+_bad_percent = re.compile(BAD_PERCENT)
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def clean_link_rows(rows, seen=None):
+    """
+    Валидация и нормализация пачки строк импорта.
+    rows - (номер строки файла, url, description).
+    seen - {ключ url: номер строки} для поиска повторов между пачками (дополняется);
+    при seen=None повторы не ищутся.
+    Возвращает (принятые {row, url, description}, отклоненные (row, url, description, error))
+    """
+    accepted, rejected = [], []
+    for number, url, description in rows:
+        url = _text(url).strip()
+        description = _control_chars.sub('', _text(description)).strip()
+        # Полностью пустые строки пропускаются без отчета
+        if not url:
+            if description:
+                rejected.append((number, url, description, 'Пустой url'))
+            continue
+        if not _scheme.match(url):
+            rejected.append((number, url, description, 'url должен начинаться с http:// или https://'))
+            continue
+        if not _host.match(url):
+            rejected.append((number, url, description, 'Некорректный хост'))
+            continue
+        # %-кодирование пути и параметров с пробелами, кириллицей и т.п., хост не кодируется
+        end = _head.match(url).end()
+        head, rest = url[:end], url[end:]
+        if _bad_percent.search(rest):
+            rejected.append((number, url, description, 'Некорректное %-кодирование'))
+            continue
+        if _needs_quoting.search(rest):
+            rest = quote(rest, safe=RESERVED + '%')
+            url = head + rest
+        if len(url) > URL_MAX_LENGTH:
+            rejected.append((number, url, description, f'url длиннее {URL_MAX_LENGTH} символов'))
+            continue
+        if seen is not None:
+            # Повтор в файле: схема и хост без учета регистра, без #фрагмента
+            first_row = seen.setdefault(head.lower() + rest.partition('#')[0], number)
+            if first_row != number:
+                rejected.append((number, url, description, f'Повтор url из строки {first_row}'))
+                continue
+        accepted.append({'row': number, 'url': url, 'description': description})
+    return accepted, rejected
+
+
+class RejectedRowsReport:
+    """CSV-отчет об отклоненных строках импорта, дописывается по пачкам"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def write(self, rejected):
+        if not rejected:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Первая пачка перезаписывает отчет (повторный запуск с тем же task_id)
+        with open(self.path, 'a' if self.count else 'w', newline='', encoding='utf-8') as target:
+            writer = csv.writer(target, lineterminator='\n')
+            if not self.count:
+                writer.writerow(REPORT_COLUMNS)
+            writer.writerows(rejected)
+        self.count += len(rejected)
@@ -0,0 +1,289 @@
+import os
+import csv
+import json
+from itertools import repeat
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+from common.utils.extract_url_from_cell import extract_url_from_cell
+from common.utils.xlsx_hyperlinks import read_sheet_hyperlinks
+
+
+# Сколько первых байт файла нужно для определения формата
+HEAD_SIZE = 4096
+
+# Реестр форматов импорта: имя -> класс, порядок важен для определения по содержимому
+IMPORTERS = {}
+
+
+def register_importer(importer):
+    IMPORTERS[importer.name] = importer
+    return importer
+
+
+def detect_importer(file_name, head=b''):
+    '''
+    Формат импорта по расширению файла, иначе по первым байтам (head).
+    None - формат не поддерживается
+    '''
+    extension = os.path.splitext(file_name)[1].lower()
+    for importer in IMPORTERS.values():
+        if extension in importer.extensions:
+            return importer
+    for importer in IMPORTERS.values():
+        if importer.sniff(head):
+            return importer
+    return None
+
+
+def open_importer(path, file_format=None):
+    '''Импортер для файла на диске: по имени формата или с определением формата'''
+    if file_format is not None:
+        if file_format not in IMPORTERS:
+            raise ValueError(f"Неизвестный формат импорта: {file_format}")
+        return IMPORTERS[file_format](path)
+    with open(path, 'rb') as source:
+        importer = detect_importer(path, source.read(HEAD_SIZE))
+    if importer is None:
+        raise ValueError("Неподдерживаемый формат файла")
+    return importer(path)
+
+
+def supported_extensions():
+    return [extension for importer in IMPORTERS.values() for extension in importer.extensions]
+
+
+def count_lines(path):
+    '''Количество строк в файле (для прогресса), чтение блоками без разбора'''
+    count = 0
+    last = b'\n'
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            count += block.count(b'\n')
+            last = block[-1:]
+    # Последняя строка без перевода строки
+    return count + (last != b'\n')
+
+
+class Importer:
+    '''
+    Потоковое чтение файла импорта пачками - списками (row, url, description)
+    (row - номер строки или записи в исходном файле, для отчета об отклоненных строках).
+    Использование: with importer(path) as reader: for batch in reader.iter_batches(size)
+    '''
+    name = None
+    extensions = ()
+
+    def __init__(self, path):
+        self.path = path
+        # Оценка количества строк для прогресса
+        self.total = 0
+
+    @classmethod
+    def sniff(cls, head):
+        '''Похож ли файл на этот формат по первым байтам'''
+        return False
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def iter_batches(self, batch_size):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@register_importer
+class XlsxImporter(Importer):
+    name = 'xlsx'
+    extensions = ('.xlsx',)
+
+    @classmethod
+    def sniff(cls, head):
+        # xlsx - zip-архив
+        return head.startswith(b'PK\x03\x04')
+
+    source = workbook = None
+
+    def open(self):
+        # Потоковое чтение Excel файла без загрузки всей книги в память.
+        # Файл передается объектом: openpyxl не открывает пути без расширения .xlsx
+        self.source = open(self.path, 'rb')
+        try:
+            self.workbook = load_workbook(self.source, read_only=True)
+            self.sheet = self.workbook.active
+            self.headers = [cell.value for cell in next(self.sheet.iter_rows(min_row=1, max_row=1)) if cell.value]
+            if 'url' not in self.headers:
+                raise ValueError("В Excel файле должна быть колонка -> url")
+            self.total = max((self.sheet.max_row or 1) - 1, 1)
+        except Exception:
+            # При ошибке в open() __exit__ не вызывается
+            self.close()
+            raise
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+        if self.source is not None:
+            self.source.close()
+
+    def iter_batches(self, batch_size):
+        hyperlinks = read_sheet_hyperlinks(self.sheet)
+        url_col_index = self.headers.index('url')
+        description_col_index = self.headers.index('description') if 'description' in self.headers else -1
+        url_col_letter = get_column_letter(url_col_index + 1)
+
+        batch = []
+        for row_num, row in enumerate(self.sheet.iter_rows(min_row=2), start=2):
+            batch.append((
+                row_num,
+                extract_url_from_cell(row[url_col_index], hyperlinks.get(f"{url_col_letter}{row_num}"))
+                if len(row) > url_col_index else None,
+                row[description_col_index].value if 0 <= description_col_index < len(row) else None,
+            ))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+@register_importer
+class ParquetImporter(Importer):
+    name = 'parquet'
+    extensions = ('.parquet',)
+
+    @classmethod
+    def sniff(cls, head):
+        return head.startswith(b'PAR1')
+
+    def open(self):
+        self.file = pq.ParquetFile(self.path)
+        names = self.file.schema_arrow.names
+        if 'url' not in names:
+            # При ошибке в open() __exit__ не вызывается
+            self.close()
+            raise ValueError("В файле должна быть колонка -> url")
+        self.columns = [name for name in ('url', 'description') if name in names]
+        self.total = self.file.metadata.num_rows
+
+    def close(self):
+        self.file.close()
+
+    def iter_batches(self, batch_size):
+        start = 1
+        for batch in self.file.iter_batches(batch_size=batch_size, columns=self.columns):
+            # Колонки arrow сразу в списки Python, без pandas
+            urls = batch.column('url').to_pylist()
+            descriptions = batch.column('description').to_pylist() if 'description' in self.columns \
+                else repeat(None)
+            yield list(zip(range(start, start + len(urls)), urls, descriptions))
+            start += len(urls)
+
+
+@register_importer
+class NdjsonImporter(Importer):
+    name = 'ndjson'
+    extensions = ('.ndjson', '.jsonl')
+
+    @classmethod
+    def sniff(cls, head):
+        return head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{')
+
+    def open(self):
+        self.total = max(count_lines(self.path), 1)
+
+    def iter_batches(self, batch_size):
+        # По объекту JSON на строку: поля url и description, row - номер строки файла
+        batch = []
+        with open(self.path, encoding='utf-8-sig') as source:
+            for number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Строка {number}: некорректный JSON ({e})")
+                if not isinstance(item, dict):
+                    raise ValueError(f"Строка {number}: ожидается объект JSON")
+                batch.append((number, item.get('url'), item.get('description')))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+class DelimitedImporter(Importer):
+    '''Текст с разделителями и строкой заголовков; разделитель - самый частый из delimiters в заголовке'''
+    delimiters = ''
+
+    @staticmethod
+    def field_name(name):
+        # Имя колонки без пробелов и кавычек вокруг: "url, description" -> url, description
+        return name.strip().strip('"')
+
+    @classmethod
+    def header(cls, head):
+        line = head.decode('utf-8-sig', errors='ignore').partition('\n')[0].rstrip('\r')
+        delimiter = max(cls.delimiters, key=line.count)
+        return delimiter, [cls.field_name(field) for field in line.split(delimiter)]
+
+    @classmethod
+    def sniff(cls, head):
+        return 'url' in cls.header(head)[1]
+
+    def open(self):
+        with open(self.path, 'rb') as source:
+            self.delimiter, fields = self.header(source.readline())
+        if 'url' not in fields:
+            raise ValueError("В файле должна быть колонка -> url")
+        self.total = max(count_lines(self.path) - 1, 1)
+
+    def iter_batches(self, batch_size):
+        # Модуль csv (C): row - номер строки файла, где начинается запись,
+        # с учетом пустых строк и полей в кавычках с переводами строк
+        with open(self.path, encoding='utf-8-sig', newline='') as source:
+            reader = csv.reader(source, delimiter=self.delimiter)
+            fields = [self.field_name(name) for name in next(reader)]
+            url_index = fields.index('url')
+            description_index = fields.index('description') if 'description' in fields else len(fields)
+            batch = []
+            line = reader.line_num
+            for record in reader:
+                number, line = line + 1, reader.line_num
+                if not record:
+                    continue
+                batch.append((
+                    number,
+                    record[url_index] if url_index < len(record) else None,
+                    record[description_index] if description_index < len(record) else None,
+                ))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+
+@register_importer
+class TsvImporter(DelimitedImporter):
+    name = 'tsv'
+    extensions = ('.tsv', '.tab')
+    delimiters = '\t'
+
+
+@register_importer
+class CsvImporter(DelimitedImporter):
+    name = 'csv'
+    extensions = ('.csv',)
+    # ; - CSV из Excel с русской локалью
+    delimiters = ',;'
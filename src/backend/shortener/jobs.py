@@ -0,0 +1,79 @@
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from .models import Job, JobLink
+
+
+def create_job(task_id, kind, **params):
+    """Запись о задаче при запуске (воркер мог успеть создать ее в start_job - состояние не трогается)"""
+    job, _ = Job.objects.update_or_create(task_id=task_id, defaults={'kind': kind, 'params': params})
+    return job
+
+
+def start_job(task_id, kind, total=0):
+    """Задача начала выполняться (запись создается, если задача запущена не через API)"""
+    job, _ = Job.objects.update_or_create(task_id=task_id, defaults={
+        'kind': kind,
+        'state': Job.STATE_PROGRESS,
+        'total': total,
+        'started_at': timezone.now(),
+    })
+    return job
+
+
+def rejected_report_path(task_id):
+    return os.path.join(settings.IMPORT_REPORTS_DIR, f'{task_id}_rejected.csv')
+
+
+def add_job_links(job, rows, processed, rejected=0):
+    """Пачка результатов импорта (строки create_links) одной вставкой + счетчики задачи"""
+    JobLink.objects.bulk_create([
+        JobLink(job=job, code=row['code'], url=row['url'],
+                description=row.get('description'), existing=row['existing'])
+        for row in rows
+    ], batch_size=5000)
+    existing = sum(1 for row in rows if row['existing'])
+    Job.objects.filter(pk=job.pk).update(
+        processed=processed,
+        created=F('created') + len(rows) - existing,
+        existing=F('existing') + existing,
+        rejected=F('rejected') + rejected,
+    )
+
+
+def job_result(job):
+    """Итог импорта вместо списка всех ссылок: счетчики и адрес постраничных результатов"""
+    return {
+        "job_id": job.pk,
+        "total_processed": job.processed,
+        "total_created": job.created,
+        "total_existing": job.existing,
+        "total_rejected": job.rejected,
+        "results_url": reverse('job-links', args=[job.task_id]),
+        "rejected_url": reverse('job-rejected', args=[job.task_id]) if job.rejected else None,
+    }
+
+
+def finish_job(task_id, **fields):
+    """Успешное завершение: fields - итоговые счетчики и artifacts"""
+    Job.objects.filter(task_id=task_id).update(state=Job.STATE_SUCCESS, finished_at=timezone.now(), **fields)
+
+
+def fail_job(task_id, error):
+    Job.objects.filter(task_id=task_id).update(state=Job.STATE_FAILURE, finished_at=timezone.now(), error=error)
+
+
+def cleanup_jobs(ttl_seconds):
+    """Удаление завершенных задач старше ttl вместе с их ссылками"""
+    jobs = Job.objects.filter(finished_at__lt=timezone.now() - timedelta(seconds=ttl_seconds))
+    for artifacts in jobs.exclude(artifacts={}).values_list('artifacts', flat=True):
+        if artifacts.get('rejected_report'):
+            try:
+                os.remove(artifacts['rejected_report'])
+            except FileNotFoundError:
+                pass
+    _, deleted = jobs.delete()
+    return deleted.get(Job._meta.label, 0)
@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from shortener.models import Link
+
+
+class Command(BaseCommand):
+    help = 'Заполнение tag_list из tags для уже существующих ссылок (пачками по диапазонам id)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_id = Link.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        table = connection.ops.quote_name(Link._meta.db_table)
+        updated = 0
+        # Каждая пачка - отдельная короткая транзакция, таблица не блокируется целиком
+        for first_id in range(1, max_id + 1, batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET tag_list = ARRAY("
+                    f"  SELECT tag FROM ("
+                    f"    SELECT trim(raw) AS tag, min(n) AS n"
+                    f"    FROM unnest(string_to_array(tags, ',')) WITH ORDINALITY AS t(raw, n) GROUP BY 1"
+                    f"  ) AS parsed WHERE tag <> '' ORDER BY n"
+                    f") "
+                    f"WHERE id BETWEEN %s AND %s AND tags IS NOT NULL AND tag_list = '{{}}'",
+                    [first_id, first_id + batch_size - 1]
+                )
+                updated += cursor.rowcount
+        self.stdout.write(f'Обновлено ссылок: {updated}')
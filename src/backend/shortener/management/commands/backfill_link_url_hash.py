@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+from django.db.models import Max
+from common.utils.normalize_url import url_hash
+from shortener.models import Link
+
+
+class Command(BaseCommand):
+    help = 'Заполнение url_hash для уже существующих ссылок (пачками по диапазонам id)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_id = Link.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        updated = 0
+        for first_id in range(1, max_id + 1, batch_size):
+            links = Link.objects.filter(
+                id__range=(first_id, first_id + batch_size - 1), url_hash__isnull=True
+            ).only('id', 'url')
+            links = list(links)
+            for link in links:
+                link.url_hash = url_hash(link.url)
+            # bulk_update не вызывает save(), кэш редиректа не затрагивается
+            updated += Link.objects.bulk_update(links, ['url_hash'])
+        self.stdout.write(f'Обновлено ссылок: {updated}')
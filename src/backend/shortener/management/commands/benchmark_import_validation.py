@@ -0,0 +1,69 @@
+import time
+import random
+from django.core.management import BaseCommand
+from shortener.import_validation import clean_link_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверка строк импорта: прежний цикл (только префикс http) '
+        'и clean_link_rows на пачках по --batch-size'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        rows = self.generate(options['rows'])
+        batch_size = options['batch_size']
+        runs = {
+            'прежний цикл (только http)': self.legacy_loop,
+            'clean_link_rows': self.clean_rows,
+        }
+        for title, run in runs.items():
+            started = time.perf_counter()
+            accepted, rejected = run(rows, batch_size)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{title:<28} {elapsed:7.3f} с, {len(rows) / elapsed:>9.0f} строк/с, '
+                f'принято {accepted}, отклонено {rejected}'
+            )
+
+    @staticmethod
+    def generate(count):
+        rnd = random.Random(0)
+        rows = []
+        for number in range(2, count + 2):
+            kind = rnd.random()
+            if kind < 0.7:
+                url = f'https://example.com/page/{number}?utm_source=mail'
+            elif kind < 0.85:
+                url = f'https://пример.рф/страница {number}'
+            elif kind < 0.9:
+                url = f'https://example.com/page/{rnd.randint(2, number)}?utm_source=mail'
+            elif kind < 0.95:
+                url = f'example.com/{number}'
+            else:
+                url = None
+            rows.append((number, url, rnd.choice(['описание', '  с пробелами\t', None, 42])))
+        return rows
+
+    @staticmethod
+    def legacy_loop(rows, batch_size):
+        # Как было в bulk_create_links: только проверка префикса
+        links = []
+        for number, url, description in rows:
+            if not url or not url.startswith('http'):
+                continue
+            links.append({'url': url, 'description': description or ''})
+        return len(links), len(rows) - len(links)
+
+    @staticmethod
+    def clean_rows(rows, batch_size):
+        seen, accepted_count, rejected_count = {}, 0, 0
+        for start in range(0, len(rows), batch_size):
+            accepted, rejected = clean_link_rows(rows[start:start + batch_size], seen)
+            accepted_count += len(accepted)
+            rejected_count += len(rejected)
+        return accepted_count, rejected_count
@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import tempfile
+import pandas as pd
+import xlsxwriter
+from django.core.management import BaseCommand
+from shortener.importers import IMPORTERS, HEAD_SIZE, detect_importer
+from shortener.import_validation import clean_link_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность чтения файлов импорта по форматам (xlsx, csv, tsv, ndjson, parquet): '
+        'одни и те же --rows строк, чтение пачками --batch-size, с --validate - и clean_link_rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--formats', nargs='+', default=list(IMPORTERS), choices=list(IMPORTERS))
+        parser.add_argument('--validate', action='store_true', help='Добавить проверку строк (clean_link_rows)')
+
+    def handle(self, *args, **options):
+        frame = pd.DataFrame({
+            'url': [f'https://example.com/page/{number}?utm_source=mail' for number in range(options['rows'])],
+            'description': [f'Ссылка {number}' for number in range(options['rows'])],
+        })
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = {}
+            for file_format in options['formats']:
+                path = os.path.join(work_dir, f'links{IMPORTERS[file_format].extensions[0]}')
+                getattr(self, f'write_{file_format}')(frame, path)
+                elapsed, count = self.read(path, options['batch_size'], options['validate'])
+                line = (
+                    f'{file_format:<8} {os.path.getsize(path) / 2 ** 20:7.1f} МБ {elapsed:8.3f} с, '
+                    f'{count / elapsed:>9.0f} строк/с'
+                )
+                if 'xlsx' in results:
+                    line += f', в {results["xlsx"] / elapsed:.1f} раз быстрее xlsx'
+                results[file_format] = elapsed
+                self.stdout.write(line)
+
+    @staticmethod
+    def read(path, batch_size, validate):
+        started = time.perf_counter()
+        with open(path, 'rb') as source:
+            # Как в задаче импорта: формат определяется по содержимому
+            importer = detect_importer('', source.read(HEAD_SIZE))
+        count = 0
+        with importer(path) as reader:
+            for batch in reader.iter_batches(batch_size):
+                if validate:
+                    clean_link_rows(batch)
+                count += len(batch)
+        return time.perf_counter() - started, count
+
+    @staticmethod
+    def write_xlsx(frame, path):
+        # url строками: гиперссылок на листе может быть не больше 65530
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, list(frame.columns))
+        for number, row in enumerate(frame.itertuples(index=False), start=1):
+            sheet.write_row(number, 0, row)
+        workbook.close()
+
+    @staticmethod
+    def write_csv(frame, path):
+        frame.to_csv(path, index=False)
+
+    @staticmethod
+    def write_tsv(frame, path):
+        frame.to_csv(path, index=False, sep='\t')
+
+    @staticmethod
+    def write_ndjson(frame, path):
+        with open(path, 'w', encoding='utf-8') as target:
+            for url, description in frame.itertuples(index=False):
+                target.write(json.dumps({'url': url, 'description': description}, ensure_ascii=False) + '\n')
+
+    @staticmethod
+    def write_parquet(frame, path):
+        frame.to_parquet(path, index=False)
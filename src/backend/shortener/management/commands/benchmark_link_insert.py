@@ -0,0 +1,46 @@
+import time
+from django.core.management import BaseCommand
+from django.db import transaction
+from shortener.models import Link
+from shortener.bulk_loader import copy_insert_links
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Сравнение ORM bulk_create и COPY загрузчика (данные откатываются)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for rows_count in options['rows']:
+            rows = [
+                {'url': f'https://example.com/page/{i}', 'description': f'Ссылка {i}', 'is_active': True}
+                for i in range(rows_count)
+            ]
+            orm_time = self.measure(lambda: Link.objects.bulk_create(
+                [Link(**row) for row in rows], batch_size=options['batch_size']
+            ))
+            copy_time = self.measure(lambda: copy_insert_links(rows))
+            self.stdout.write(
+                f'{rows_count:>9} строк: ORM {orm_time:8.2f} c ({rows_count / orm_time:>9.0f} строк/c), '
+                f'COPY {copy_time:8.2f} c ({rows_count / copy_time:>9.0f} строк/c), '
+                f'x{orm_time / copy_time:.1f}'
+            )
+
+    @staticmethod
+    def measure(func):
+        """Замер времени внутри транзакции, которая затем откатывается"""
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                func()
+                elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            pass
+        return elapsed
@@ -0,0 +1,34 @@
+import json
+import time
+from django.core.management import BaseCommand, CommandError
+from shortener.models import Link
+from shortener.serializers import LinkGETSerializer, FastLinkListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Сравнение LinkGETSerializer и FastLinkListSerializer: скорость и совпадение вывода'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        links = Link.objects.order_by('created_at', 'id')[:options['rows']]
+
+        started = time.perf_counter()
+        drf_data = LinkGETSerializer(list(links), many=True).data
+        drf_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        fast_serializer = FastLinkListSerializer()
+        fast_data = fast_serializer.many(fast_serializer.values(links))
+        fast_time = time.perf_counter() - started
+
+        # Сравнение в JSON виде, как его получает клиент
+        if json.dumps(drf_data, ensure_ascii=False) != json.dumps(fast_data, ensure_ascii=False):
+            raise CommandError('Вывод сериализаторов не совпадает')
+
+        rows_count = len(fast_data)
+        self.stdout.write(
+            f'{rows_count} строк: DRF {drf_time:.2f} c, fast {fast_time:.2f} c, '
+            f'x{drf_time / fast_time if fast_time else 0:.1f}, вывод совпадает'
+        )
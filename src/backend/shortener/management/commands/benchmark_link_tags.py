@@ -0,0 +1,55 @@
+import time
+import random
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from shortener.models import Link
+from shortener.bulk_loader import copy_insert_links
+from shortener.tags import filter_by_tags
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Сравнение поиска по тегам через LIKE и через GIN индекс по tag_list (данные откатываются)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--tags', type=int, default=1000, help='Размер словаря тегов')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        vocabulary = [f'tag{i}' for i in range(options['tags'])]
+        rnd = random.Random(0)
+        rows = [
+            {'url': f'https://example.com/page/{i}', 'tags': ','.join(rnd.sample(vocabulary, rnd.randint(0, 4)))}
+            for i in range(options['rows'])
+        ]
+        try:
+            with transaction.atomic():
+                copy_insert_links(rows)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(Link._meta.db_table)}')
+                self.run_queries(vocabulary[:3], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run_queries(self, tags, repeat):
+        links = Link.objects.all()
+        queries = {
+            'LIKE (1 тег)': links.filter(tags__contains=tags[0]),
+            'tag_list @> (1 тег)': filter_by_tags(links, tags_all=tags[:1]),
+            'tag_list @> (2 тега, И)': filter_by_tags(links, tags_all=tags[:2]),
+            'tag_list && (3 тега, ИЛИ)': filter_by_tags(links, tags_any=tags),
+        }
+        for title, queryset in queries.items():
+            queryset = queryset.values_list('id', flat=True)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                found = len(list(queryset))
+            elapsed = (time.perf_counter() - started) / repeat
+            plan = queryset.explain().splitlines()
+            scan = next((line.strip() for line in plan if 'Scan' in line), plan[0])
+            self.stdout.write(f'{title:<28} {elapsed * 1000:9.1f} мс, найдено {found:>7}: {scan}')
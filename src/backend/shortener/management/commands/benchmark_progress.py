@@ -0,0 +1,57 @@
+import time
+import uuid
+from celery import Celery
+from celery.app.task import Context
+from django.core.management import BaseCommand
+from shortener.progress import ProgressReporter, get_progress
+
+
+class Command(BaseCommand):
+    help = (
+        'Накладные расходы прогресса задач на N строк: update_state через result backend '
+        'каждые 10 строк (как было) против ProgressReporter с троттлингом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000)
+        parser.add_argument('--broker', default='memory://',
+                            help='Брокер для старого варианта (memory:// - без сети, нижняя оценка)')
+        parser.add_argument('--backend', default='rpc://', help='Result backend для старого варианта')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        baseline = self.run(rows, lambda current: None)
+        self.stdout.write(f'{"без прогресса":<28} {baseline:8.3f} с')
+
+        app = Celery('benchmark_progress', broker=options['broker'], backend=options['backend'])
+        task_id = str(uuid.uuid4())
+        request = Context(id=task_id, reply_to=str(uuid.uuid4()), correlation_id=task_id)
+        writes = [0]
+
+        def update_state(current):
+            if current % 10 == 0:
+                app.backend.store_result(task_id, {'current': current, 'total': rows}, 'PROGRESS', request=request)
+                writes[0] += 1
+        self.report('update_state каждые 10 строк', self.run(rows, update_state), baseline, writes[0])
+
+        progress = ProgressReporter(task_id, total=rows)
+        elapsed = self.run(rows, lambda current: progress.update(current, stage='Обработка строк'))
+        progress.finish()
+        self.report('ProgressReporter', elapsed, baseline, progress.writes)
+        self.stdout.write(f'Прочитано из кэша progress: {get_progress(task_id)}')
+
+    @staticmethod
+    def run(rows, report):
+        # Имитация обработки строки импорта, чтобы сравнивать именно прогресс
+        started = time.perf_counter()
+        for current in range(1, rows + 1):
+            {'url': f'https://example.com/{current}', 'is_active': True}
+            report(current)
+        return time.perf_counter() - started
+
+    def report(self, title, elapsed, baseline, writes):
+        overhead = elapsed - baseline
+        self.stdout.write(
+            f'{title:<28} {elapsed:8.3f} с, накладные {overhead:8.3f} с '
+            f'({overhead / elapsed * 100:5.1f}%), записей {writes}'
+        )
@@ -0,0 +1,86 @@
+import time
+import random
+import asyncio
+from urllib.parse import urlsplit
+from django.core.management import BaseCommand, CommandError
+from shortener.models import Link
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест редиректа: RPS и перцентили задержки для нескольких серверов, '
+        'например --target sync=http://127.0.0.1:8000 --target async=http://127.0.0.1:8001'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, help='имя=http://host:port')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--codes', type=int, default=1000, help='Сколько разных кодов запрашивать')
+        parser.add_argument('--links', choices=('all', 'plain', 'templated'), default='all',
+                            help='Обычные ссылки или ссылки с шаблоном URL')
+
+    def handle(self, *args, **options):
+        links = Link.objects.all()
+        if options['links'] != 'all':
+            links = links.filter(template__isnull=options['links'] == 'plain')
+        codes = list(links.values_list('code', flat=True)[:options['codes']])
+        if not codes:
+            raise CommandError('В БД нет ссылок')
+        for target in options['target']:
+            name, _, url = target.partition('=')
+            stats = asyncio.run(self.run_target(url or name, codes, options['concurrency'], options['duration']))
+            self.stdout.write(
+                f'{name:<10} {stats["rps"]:>9.0f} RPS, p50 {stats["p50"]:7.2f} мс, '
+                f'p99 {stats["p99"]:7.2f} мс, ошибок {stats["errors"]}'
+            )
+
+    async def run_target(self, url, codes, concurrency, duration):
+        latencies = []
+        errors = [0]
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.client(url, codes, deadline, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        percentile = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(0.5),
+            'p99': percentile(0.99),
+            'errors': errors[0],
+        }
+
+    @staticmethod
+    async def client(url, codes, deadline, latencies, errors):
+        """Клиент HTTP/1.1 с keep-alive на asyncio (без сторонних библиотек), ответ - 302 без тела"""
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        rnd = random.Random()
+        connection = None
+        while time.perf_counter() < deadline:
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(host, port)
+                reader, writer = connection
+                started = time.perf_counter()
+                writer.write(f'GET /{rnd.choice(codes)} HTTP/1.1\r\nHost: {parts.netloc}\r\n\r\n'.encode())
+                status = int((await reader.readline()).split()[1])
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get('content-length', 0)))
+                latencies.append(time.perf_counter() - started)
+                if status != 302:
+                    errors[0] += 1
+                if headers.get('connection', '').lower() == 'close':
+                    writer.close()
+                    connection = None
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                errors[0] += 1
+                connection = None
+        if connection is not None:
+            connection[1].close()
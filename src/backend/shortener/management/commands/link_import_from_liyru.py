@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import logging
+import multiprocessing
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connections
+from tqdm import tqdm
+
+from common.utils.json_stream import iter_json_array
+from shortener.models import Template
+from shortener.bulk_loader import copy_insert_links
+
+
+class Command(BaseCommand):
+
+    def __init__(self):
+        super().__init__()
+        self.template_data = {
+            1: {
+                'title':    'SPN токен гиперссылка и далее',
+                'url':      'https://spnavigator.ru/t/{токен}?next={гиперссылка}%3F{параметры}',
+                "created":  "2019-11-19 10:43:00.216633",
+                "modified": "2019-11-19 10:43:00.217427",
+
+            },
+            2: {
+                'title':    'SPN токен гиперссылка источник',
+                'url':      'https://spnavigator.ru/t/{токен}?next={гиперссылка}?src={источник}',
+                "created":  "2019-11-19 11:51:28.010442",
+                "modified": "2019-11-19 11:51:28.010525",
+
+            },
+            3: {
+                'uid':      '13d55d0f-0dc4-4021-b219-b22fe20a7cc9',
+                'title':    '_url_',
+                'url':      '{гиперссылка}',
+                "created":  "2019-11-19 11:51:37.258250",
+                "modified": "2019-11-19 11:51:37.258324",
+
+            },
+            4: {
+                'title':    '_Универсальный с почтой_',
+                'url':      'https://spnavigator.ru/utils/r/{проект}-{код рассылки}/{email}/{гиперссылка}',
+                "created":  "2019-12-12 12:15:33.406498",
+                "modified": "2019-12-12 12:15:37.875786",
+
+            },
+            5: {
+                'title':    '_Универсальный с телефоном_',
+                'url':      'https://spnavigator.ru/utils/r/{проект}-{код рассылки}/{телефон}/{гиперссылка}',
+                "created":  "2019-12-27 21:09:59.796523",
+                "modified": "2019-12-27 21:13:20.002874",
+
+            },
+        }
+
+    logger = logging.getLogger(__name__)
+    help = (
+        'Импорт ссылок из дампа старой системы (JSON-массив): потоковое чтение, '
+        'пачки вставляются через COPY в пуле процессов, прогресс сохраняется в checkpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--links', default=os.path.join(settings.BASE_DIR, 'upload', 'shorter_link.json'),
+                            help='Дамп таблицы ссылок (JSON-массив)')
+        parser.add_argument('--chunk-size', type=int, default=20000)
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--restart', action='store_true', help='Начать заново, игнорируя checkpoint')
+
+    def handle(self, *args, **options):
+        source = options['links']
+        chunk_size = options['chunk_size']
+        checkpoint = Checkpoint(f'{source}.checkpoint', source, chunk_size)
+        done_chunks = 0 if options['restart'] else checkpoint.load()
+        if done_chunks:
+            self.stdout.write(f'Продолжение с пачки {done_chunks} ({done_chunks * chunk_size} записей уже загружено)')
+
+        templates = self.prepare_templates()
+        # Соединение родителя не должно наследоваться воркерами через fork
+        connections.close_all()
+
+        started = time.perf_counter()
+        processed = inserted = 0
+        with open(source, 'r', encoding='utf8') as file, ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=connections.close_all,
+        ) as pool, tqdm(desc='Импорт ссылок', unit=' ссылок', initial=done_chunks * chunk_size) as progress:
+            chunks = islice(enumerate(batched(iter_json_array(file), chunk_size)), done_chunks, None)
+            running = set()
+            completed = set()
+            for index, records in chunks:
+                # Не больше двух пачек на воркер в памяти
+                if len(running) >= options['workers'] * 2:
+                    wait(running, return_when=FIRST_COMPLETED)
+                finished = {future for future in running if future.done()}
+                running -= finished
+                done_chunks, processed, inserted = self.collect(
+                    finished, completed, done_chunks, checkpoint, progress, processed, inserted
+                )
+                running.add(pool.submit(import_chunk, index, records, templates))
+            done_chunks, processed, inserted = self.collect(
+                wait(running).done, completed, done_chunks, checkpoint, progress, processed, inserted
+            )
+
+        checkpoint.clear()
+        elapsed = time.perf_counter() - started
+        message = (
+            f'Обработано записей: {processed}, новых ссылок: {inserted}, '
+            f'{elapsed:.1f} с ({processed / elapsed if elapsed else 0:.0f} записей/с)'
+        )
+        self.logger.info(message)
+        self.stdout.write(message)
+
+    @staticmethod
+    def collect(finished, completed, done_chunks, checkpoint, progress, processed, inserted):
+        """Учет завершенных пачек. Checkpoint - число пачек с начала файла, загруженных без пропусков"""
+        for future in finished:
+            index, count, created = future.result()
+            completed.add(index)
+            processed += count
+            inserted += created
+            progress.update(count)
+        if not finished:
+            return done_chunks, processed, inserted
+        while done_chunks in completed:
+            completed.remove(done_chunks)
+            done_chunks += 1
+        checkpoint.save(done_chunks)
+        progress.set_postfix_str(f'новых: {inserted}')
+        return done_chunks, processed, inserted
+
+    def prepare_templates(self):
+        """
+        Подготовка шаблонов: id шаблона в дампе -> id шаблона в БД
+        """
+        templates = {}
+        for id, template_data in self.template_data.items():
+            template, _ = Template.objects.get_or_create(url_template=template_data['url'])
+            templates[id] = template.pk
+        return templates
+
+
+def import_chunk(index, records, templates):
+    """Вставка пачки записей дампа в процессе пула, повторная вставка пачки ничего не дублирует"""
+    rows = []
+    for link in records:
+        params = {
+            'code':            link['code'],
+            'url':             link['url'],
+            'template_fields': link['template_fields'],
+            'template':        templates.get(link['template_id']),
+        }
+        if 'created' in link:
+            params['created_at'] = link['created']
+        rows.append(params)
+    # Вставка через COPY, ON CONFLICT по code
+    _, inserted = copy_insert_links(rows)
+    return index, len(records), len(inserted)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Checkpoint:
+    """Прогресс импорта в файле рядом с дампом (сбрасывается, если дамп или размер пачки изменились)"""
+
+    def __init__(self, path, source, chunk_size):
+        self.path = path
+        self.key = {'source': os.path.abspath(source), 'size': os.path.getsize(source), 'chunk_size': chunk_size}
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if {key: data.get(key) for key in self.key} != self.key:
+            return 0
+        return data.get('done_chunks', 0)
+
+    def save(self, done_chunks):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            json.dump({**self.key, 'done_chunks': done_chunks}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверка перед запуском сервера: системные проверки с БД (соединение, кэш, MEDIA_ROOT), '
+        'примененные миграции и последовательность кодов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        # Ошибки системных проверок прерывают команду (SystemCheckError)
+        call_command('check', databases=[alias])
+
+        connection = connections[alias]
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            raise CommandError(f'В БД {alias} есть непримененные миграции (python manage.py migrate)')
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('shortener_code_seq')")
+                if cursor.fetchone()[0] is None:
+                    raise CommandError('Нет последовательности shortener_code_seq для выдачи кодов')
+        self.stdout.write('Проверка перед запуском пройдена')
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.datetime
+import django.utils.timezone
+import shortener.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('task_id', models.CharField(max_length=255, unique=True)),
+                ('file_path', models.CharField(max_length=1024)),
+                ('filename', models.CharField(max_length=255)),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Архив экспорта',
+                'verbose_name_plural': 'Архивы экспорта',
+            },
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(max_length=255, unique=True)),
+                ('kind', models.CharField(choices=[('import', 'Импорт ссылок'), ('export', 'Экспорт ссылок')], max_length=16)),
+                ('state', models.CharField(choices=[('PENDING', 'Ожидает'), ('PROGRESS', 'Выполняется'), ('SUCCESS', 'Готово'), ('FAILURE', 'Ошибка')], default='PENDING', max_length=16)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('existing', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('artifacts', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+            },
+        ),
+        migrations.CreateModel(
+            name='Template',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_template', models.CharField(max_length=512)),
+            ],
+            options={
+                'verbose_name': 'Шаблон URL',
+                'verbose_name_plural': 'Шаблоны URL',
+            },
+        ),
+        migrations.CreateModel(
+            name='Click',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50)),
+                ('clicked_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Переход',
+                'verbose_name_plural': 'Переходы',
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['clicked_at'], name='click_clicked_at_brin'), models.Index(fields=['code', 'clicked_at'], name='click_code_clicked_at_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50)),
+                ('url', models.URLField(max_length=2048)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('existing', models.BooleanField(default=False)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='links', to='shortener.job')),
+            ],
+            options={
+                'verbose_name': 'Ссылка задачи',
+                'verbose_name_plural': 'Ссылки задач',
+            },
+        ),
+        migrations.CreateModel(
+            name='LinkDailyClicks',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('clicks', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Переходы за день',
+                'verbose_name_plural': 'Переходы по дням',
+                'constraints': [models.UniqueConstraint(fields=('code', 'day'), name='link_daily_clicks_code_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Link',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=2048)),
+                ('url_hash', models.BigIntegerField(blank=True, db_index=True, editable=False, null=True)),
+                ('name', models.CharField(blank=True, null=True, verbose_name='Название URl-а')),
+                ('code', models.CharField(default=shortener.models.generate_short_code, max_length=50, unique=True)),
+                ('is_active', models.BooleanField(default=False)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('tags', models.CharField(blank=True, max_length=255, null=True)),
+                ('tag_list', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_default=django.db.models.functions.datetime.Now())),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, null=True)),
+                ('template_fields', models.JSONField(blank=True, null=True, verbose_name='Набор данных для подставления ссылки')),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='shortener.template')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='link_created_at_id_idx'), django.contrib.postgres.indexes.GinIndex(fields=['tag_list'], name='link_tag_list_gin')],
+            },
+        ),
+    ]
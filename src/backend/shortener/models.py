@@ -1,20 +1,21 @@
 from django.db import models
+from django.db.models.functions import Now
+from django.utils import timezone
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
 import re
-import random
-import string
 from urllib.parse import quote, unquote
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from urllib.parse import quote
+from .tags import split_tags
+from common.utils.normalize_url import url_hash
+
+def generate_short_code():
+    """Генерация уникального кода для основного URL (без запросов к БД на каждый код)"""
+    from .code_allocator import get_code_allocator
+    return get_code_allocator().next_code()
 
-def generate_short_code(length=6):
-    """Генерация уникального кода для основного URL"""
-    characters = string.ascii_letters + string.digits
-    while True:
-        code = ''.join(random.choice(characters) for _ in range(length))
-        if not Link.objects.filter(code=code).exists():
-            return code
-        
 
 class Template(models.Model):
     url_template = models.CharField(max_length=512)
@@ -25,17 +26,45 @@ class Template(models.Model):
 
 class Link(models.Model):
     url = models.URLField(max_length=2048)
+    # Хэш нормализованного url для поиска дублей (shortener.dedup), заполняется в save()
+    url_hash = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
     name = models.CharField("Название URl-а", null=True, blank=True)
     code = models.CharField(max_length=50, unique=True, default=generate_short_code)
     is_active = models.BooleanField(default=False)
     description = models.TextField(blank=True, null=True)
     tags = models.CharField(max_length=255, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True, null=True)
+    # Теги из tags в виде массива для поиска по GIN индексу, заполняется в save()
+    tag_list = ArrayField(models.CharField(max_length=255), default=list, blank=True)
+    # NOT NULL для keyset-пагинации; db_default - для строк без save() (COPY, фикстуры),
+    # миграция заполняет им и старые строки с NULL
+    created_at = models.DateTimeField(auto_now_add=True, db_default=Now())
+    # Основа дельта-экспорта (since): при изменении ссылок в обход save()
+    # (QuerySet.update, bulk_update, SQL) updated_at нужно выставлять явно
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
     template_fields = models.JSONField("Набор данных для подставления ссылки", null=True, blank=True)
     template = models.ForeignKey('Template', on_delete=models.PROTECT, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Keyset-пагинация списка ссылок
+            models.Index(fields=['created_at', 'id'], name='link_created_at_id_idx'),
+            GinIndex(fields=['tag_list'], name='link_tag_list_gin'),
+        ]
+
     def __str__(self):
         return f"{self.code} -> {self.name} -> {self.url}"
+
+    def save(self, *args, **kwargs):
+        self.tag_list = split_tags(self.tags)
+        self.url_hash = url_hash(self.url) if self.url else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'tags' in update_fields:
+                update_fields = {*update_fields, 'tag_list'}
+            if 'url' in update_fields:
+                update_fields = {*update_fields, 'url_hash'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
     
     def get_encoded_url(self):
         """Функция для возврата правильно закодированных русских символов"""
@@ -44,4 +73,110 @@ class Link(models.Model):
     def is_taken(self):
         if self.url is None:
             return False
-        return True
\ No newline at end of file
+        return True
+
+
+class ExportArchive(models.Model):
+    """Реестр готовых архивов экспорта (для повторного использования и очистки)"""
+    fingerprint = models.CharField(max_length=64, unique=True)
+    task_id = models.CharField(max_length=255, unique=True)
+    file_path = models.CharField(max_length=1024)
+    filename = models.CharField(max_length=255)
+    file_size = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Архив экспорта'
+        verbose_name_plural = 'Архивы экспорта'
+
+    def __str__(self):
+        return f"{self.filename} ({self.file_size} байт)"
+
+
+class Click(models.Model):
+    """Переход по короткой ссылке (пишется пачками из буфера, см. shortener.clicks)"""
+    code = models.CharField(max_length=50)
+    clicked_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Переход'
+        verbose_name_plural = 'Переходы'
+        indexes = [
+            # Таблица только дополняется по времени, BRIN по clicked_at почти ничего не стоит
+            BrinIndex(fields=['clicked_at'], name='click_clicked_at_brin'),
+            models.Index(fields=['code', 'clicked_at'], name='click_code_clicked_at_idx'),
+        ]
+
+
+class LinkDailyClicks(models.Model):
+    """Количество переходов по ссылке за день"""
+    code = models.CharField(max_length=50)
+    day = models.DateField()
+    clicks = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Переходы за день'
+        verbose_name_plural = 'Переходы по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['code', 'day'], name='link_daily_clicks_code_day_uniq'),
+        ]
+
+
+class Job(models.Model):
+    """Фоновая задача импорта или экспорта: состояние, счетчики, время выполнения и результаты"""
+    KIND_IMPORT = 'import'
+    KIND_EXPORT = 'export'
+    KIND_CHOICES = [
+        (KIND_IMPORT, 'Импорт ссылок'),
+        (KIND_EXPORT, 'Экспорт ссылок'),
+    ]
+    STATE_PENDING = 'PENDING'
+    STATE_PROGRESS = 'PROGRESS'
+    STATE_SUCCESS = 'SUCCESS'
+    STATE_FAILURE = 'FAILURE'
+    STATE_CHOICES = [
+        (STATE_PENDING, 'Ожидает'),
+        (STATE_PROGRESS, 'Выполняется'),
+        (STATE_SUCCESS, 'Готово'),
+        (STATE_FAILURE, 'Ошибка'),
+    ]
+
+    task_id = models.CharField(max_length=255, unique=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default=STATE_PENDING)
+    # Параметры запуска (base_url, dedup, generate_qr, since, теги)
+    params = models.JSONField(default=dict, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    existing = models.PositiveIntegerField(default=0)
+    # Строки импорта, не прошедшие проверку (см. shortener.import_validation)
+    rejected = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    # Файлы результата (архив экспорта: file_path, filename, download_url, file_size;
+    # отчет об отклоненных строках импорта: rejected_report)
+    artifacts = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f"{self.kind} {self.task_id} ({self.state})"
+
+
+class JobLink(models.Model):
+    """Ссылка, созданная импортом (или найденная при dedup) - результат задачи постранично"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='links')
+    code = models.CharField(max_length=50)
+    url = models.URLField(max_length=2048)
+    description = models.TextField(blank=True, null=True)
+    existing = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = 'Ссылка задачи'
+        verbose_name_plural = 'Ссылки задач'
@@ -0,0 +1,60 @@
+import json
+import base64
+import binascii
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = json.dumps([created_at.isoformat() if created_at else None, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (parse_datetime(created_at) if created_at else None), int(pk)
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor("Некорректный cursor")
+
+
+def keyset_paginate(queryset, cursor=None, limit=100, key=lambda row: (row['created_at'], row['id'])):
+    """
+    Keyset-пагинация по (created_at, id) - стоимость страницы не зависит от ее номера.
+    Сравнение строк (created_at, id) > (%s, %s) Postgres выполняет как диапазон индекса (created_at, id),
+    created_at - NOT NULL.
+    key - получение (created_at, id) из строки queryset.
+    Возвращает (строки страницы, cursor следующей страницы или None)
+    """
+    queryset = queryset.order_by('created_at', 'id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        if created_at is None:
+            raise InvalidCursor("Некорректный cursor")
+        table = queryset.model._meta.db_table
+        queryset = queryset.extra(
+            where=[f'("{table}"."created_at", "{table}"."id") > (%s, %s)'], params=[created_at, pk]
+        )
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*key(rows[-1]))
+    return rows, next_cursor
+
+
+def id_paginate(queryset, cursor=None, limit=100):
+    """Keyset-пагинация по id (для таблиц без created_at), queryset - values() с id"""
+    queryset = queryset.order_by('id')
+    if cursor:
+        _, pk = decode_cursor(cursor)
+        queryset = queryset.filter(id__gt=pk)
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(None, rows[-1]['id'])
+    return rows, next_cursor
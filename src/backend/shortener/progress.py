@@ -0,0 +1,72 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Состояния итоговой записи (после них поток прогресса закрывается)
+FINAL_STATES = ('SUCCESS', 'FAILURE')
+
+
+def progress_key(task_id):
+    return f'progress:{task_id}'
+
+
+class ProgressReporter:
+    """
+    Прогресс фоновой задачи с троттлингом: запись в кэш CACHES[TASK_PROGRESS['ALIAS']]
+    не чаще раза в interval секунд, либо при изменении процента на min_delta,
+    либо принудительно (force, смена этапа). Вызов update на каждой строке почти бесплатен
+    """
+
+    def __init__(self, task_id, total=0, interval=None, min_delta=None, cache=None, clock=time.monotonic):
+        self.task_id = task_id
+        self.total = total
+        self.interval = settings.TASK_PROGRESS['INTERVAL'] if interval is None else interval
+        self.min_delta = settings.TASK_PROGRESS['MIN_DELTA'] if min_delta is None else min_delta
+        self.cache = cache or caches[settings.TASK_PROGRESS['ALIAS']]
+        self.clock = clock
+        self.writes = 0
+        self.current = 0
+        # Пороги следующей записи: время и значение current (min_delta в строках)
+        self._next_at = None
+        self._next_current = None
+
+    def percent(self, current):
+        return round(current / self.total * 100, 2) if self.total else 0
+
+    def due(self, current):
+        """Пора ли писать прогресс (для случаев, когда meta дорого собирать на каждой строке)"""
+        return self._next_at is None or current >= self._next_current or self.clock() >= self._next_at
+
+    def update(self, current, total=None, force=False, **meta):
+        """Запись прогресса, если прошло interval секунд или процент изменился на min_delta"""
+        self.current = current
+        if total is not None:
+            self.total = total
+        if not force and not self.due(current):
+            return False
+        self.cache.set(progress_key(self.task_id), {
+            'state': 'PROGRESS',
+            'current': current,
+            'total': self.total,
+            'percent': self.percent(current),
+            'updated_at': time.time(),
+            **meta,
+        }, settings.TASK_PROGRESS['TTL'])
+        self._next_at = self.clock() + self.interval
+        self._next_current = current + self.min_delta * self.total / 100
+        self.writes += 1
+        return True
+
+    def finish(self, **meta):
+        """Итоговая запись (100%), meta - результат для клиента (ссылка на скачивание и т.п.)"""
+        return self.update(self.total, force=True, state='SUCCESS', **meta)
+
+    def fail(self, error):
+        """Итоговая запись при ошибке задачи"""
+        return self.update(self.current, force=True, state='FAILURE', error=error)
+
+
+def get_progress(task_id, cache=None):
+    """Последний записанный прогресс задачи или None"""
+    return (cache or caches[settings.TASK_PROGRESS['ALIAS']]).get(progress_key(task_id))
@@ -0,0 +1,126 @@
+import re
+import json
+import time
+import asyncio
+from django.conf import settings
+from django.core.cache import caches
+from .progress import progress_key, FINAL_STATES
+
+
+# /api/shortener/progress/<task_id>/stream/ (task_id импорта или экспорта)
+STREAM_PATH = re.compile(r'^/api/shortener/progress/(?P<task_id>[\w\-]+)/stream/?$')
+
+
+def sse_event(data, event=None, retry=None):
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class ProgressStreamApp:
+    """
+    ASGI-приложение перед Django: GET /api/shortener/progress/<task_id>/stream/ - поток
+    Server-Sent Events с прогрессом задачи из кэша progress (события progress и итоговое complete).
+    Открытый поток - корутина, а не воркер WSGI; кэш читается раз в poll_interval на задачу,
+    сколько бы клиентов ее ни слушали
+    """
+
+    def __init__(self, app, cache=None, poll_interval=0.5, heartbeat=15, timeout=600, retry=3000):
+        self.app = app
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+        self.retry = retry
+        # task_id -> (время устаревания, future чтения кэша), общий для всех слушателей задачи
+        self._reads = {}
+        self._listeners = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = STREAM_PATH.match(scope['path'][len(scope.get('root_path', '')):])
+            if match is not None:
+                return await self.stream(match['task_id'], receive, send)
+        return await self.app(scope, receive, send)
+
+    def get_cache(self):
+        if self.cache is None:
+            self.cache = caches[settings.TASK_PROGRESS['ALIAS']]
+        return self.cache
+
+    async def read(self, task_id):
+        now = time.monotonic()
+        entry = self._reads.get(task_id)
+        if entry is None or entry[0] <= now:
+            entry = (now + self.poll_interval, asyncio.ensure_future(self.get_cache().aget(progress_key(task_id))))
+            self._reads[task_id] = entry
+        return await asyncio.shield(entry[1])
+
+    async def stream(self, task_id, receive, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                # nginx не буферизует события
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': sse_event(None, retry=self.retry), 'more_body': True})
+
+        self._listeners[task_id] = self._listeners.get(task_id, 0) + 1
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            last_updated_at = None
+            sent_at = started = time.monotonic()
+            while True:
+                progress = await self.read(task_id)
+                if progress is not None and progress.get('updated_at') != last_updated_at:
+                    last_updated_at = progress.get('updated_at')
+                    complete = progress.get('state') in FINAL_STATES
+                    await send({
+                        'type': 'http.response.body',
+                        'body': sse_event(progress, 'complete' if complete else 'progress'),
+                        'more_body': not complete,
+                    })
+                    if complete:
+                        return
+                    sent_at = time.monotonic()
+                elif time.monotonic() - sent_at >= self.heartbeat:
+                    # Комментарий SSE держит соединение живым через прокси
+                    await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                    sent_at = time.monotonic()
+
+                if time.monotonic() - started >= self.timeout:
+                    # Клиент (EventSource) переподключится через retry
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+                await asyncio.wait([disconnected], timeout=self.poll_interval)
+                if disconnected.done():
+                    return
+        finally:
+            disconnected.cancel()
+            self._listeners[task_id] -= 1
+            if not self._listeners[task_id]:
+                del self._listeners[task_id]
+                self._reads.pop(task_id, None)
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+
+def build_progress_stream_app(app):
+    return ProgressStreamApp(
+        app,
+        poll_interval=settings.PROGRESS_STREAM['POLL_INTERVAL'],
+        heartbeat=settings.PROGRESS_STREAM['HEARTBEAT'],
+        timeout=settings.PROGRESS_STREAM['TIMEOUT'],
+    )
@@ -0,0 +1,165 @@
+import os
+import time
+import hashlib
+import tempfile
+import qrcode
+from io import BytesIO
+from qrcode.image.svg import SvgPathImage
+from qrcode.image.pil import PilImage
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
+from django.conf import settings
+
+
+QR_FORMATS = ('svg', 'png', 'pdf')
+
+
+def render_qr(short_url, box_size=10, border=4):
+    '''
+    Рендер QR-кода во всех форматах.
+    Матрица QR строится один раз и переиспользуется для SVG и PNG, PDF собирается из PNG
+    '''
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(short_url)
+    qr.make(fit=True)
+
+    # SVG
+    svg_buffer = BytesIO()
+    qr.make_image(image_factory=SvgPathImage).save(svg_buffer)
+
+    # PNG
+    png_buffer = BytesIO()
+    img = qr.make_image(image_factory=PilImage)
+    img.save(png_buffer, format="PNG")
+
+    # PDF
+    pdf_buffer = BytesIO()
+    img_width, img_height = img.size
+    c = canvas.Canvas(pdf_buffer, pagesize=(img_width, img_height))
+    png_buffer.seek(0)
+    c.drawImage(ImageReader(png_buffer), 0, 0, width=img_width, height=img_height)
+    c.showPage()
+    c.save()
+
+    return {
+        'svg': svg_buffer.getvalue(),
+        'png': png_buffer.getvalue(),
+        'pdf': pdf_buffer.getvalue(),
+    }
+
+
+class QRArtifactStore:
+    '''
+    Контентно-адресуемое хранилище QR-кодов на диске.
+    Ключ - (short_url, формат, box_size, border), файлы создаются лениво
+    при первом запросе и вытесняются по давности использования при превышении max_bytes.
+    Файлы, использованные за последние min_age секунд, не вытесняются
+    '''
+
+    def __init__(self, root, max_bytes, min_age=600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+
+    @staticmethod
+    def make_key(short_url, qr_format, box_size, border):
+        raw = f"{short_url}|{qr_format}|{box_size}|{border}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get_path(self, short_url, qr_format, box_size=10, border=4):
+        key = self.make_key(short_url, qr_format, box_size, border)
+        return os.path.join(self.root, key[:2], f"{key}.{qr_format}")
+
+    def get(self, short_url, qr_format, box_size=10, border=4):
+        '''Путь к файлу QR-кода, при отсутствии рендерятся сразу все форматы'''
+        return self.get_all(short_url, box_size, border)[qr_format]
+
+    def get_all(self, short_url, box_size=10, border=4):
+        paths = {
+            qr_format: self.get_path(short_url, qr_format, box_size, border)
+            for qr_format in QR_FORMATS
+        }
+        try:
+            # Отметка использования для вытеснения по давности
+            for path in paths.values():
+                os.utime(path)
+            return paths
+        except FileNotFoundError:
+            pass
+
+        self._render_all(short_url, box_size, border, paths)
+        return paths
+
+    def open(self, short_url, qr_format, box_size=10, border=4):
+        '''Открытый файл QR-кода: удаление файла после открытия чтению не мешает'''
+        try:
+            return open(self.get(short_url, qr_format, box_size, border), 'rb')
+        except FileNotFoundError:
+            # Вытеснен между get и open - рендер заново
+            return open(self.get(short_url, qr_format, box_size, border), 'rb')
+
+    def read_all(self, short_url, box_size=10, border=4):
+        '''Содержимое QR-кода во всех форматах {формат: bytes}'''
+        paths = self.get_all(short_url, box_size, border)
+        contents = {}
+        try:
+            for qr_format, path in paths.items():
+                with open(path, 'rb') as source:
+                    contents[qr_format] = source.read()
+        except FileNotFoundError:
+            # Вытеснен между get_all и чтением - рендер заново
+            contents = self._render_all(short_url, box_size, border, paths)
+        return contents
+
+    def _render_all(self, short_url, box_size, border, paths):
+        contents = render_qr(short_url, box_size, border)
+        for qr_format, content in contents.items():
+            self._write_atomic(paths[qr_format], content)
+        return contents
+
+    def evict(self):
+        '''Удаление давно неиспользуемых файлов, пока размер больше 90% от max_bytes'''
+        files = []
+        total = 0
+        # Недавно использованные файлы может читать экспорт или QRCodeView
+        recent = time.time() - self.min_age
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                if stat.st_mtime < recent:
+                    files.append((stat.st_mtime, stat.st_size, path))
+
+        removed = 0
+        if total <= self.max_bytes:
+            return removed
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    @staticmethod
+    def _write_atomic(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+qr_store = QRArtifactStore(
+    root=settings.QR_CACHE['ROOT'],
+    max_bytes=settings.QR_CACHE['MAX_BYTES'],
+    min_age=settings.QR_CACHE['EVICT_MIN_AGE_SECONDS'],
+)
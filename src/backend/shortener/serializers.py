@@ -1,7 +1,23 @@
-import os
+from django.conf import settings
 from rest_framework import serializers
-from .models import Link, Template
-from urllib.parse import unquote
+from rest_framework.settings import api_settings
+from rest_framework import ISO_8601
+from django.utils import timezone
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.fields import empty, SkipField
+from .models import Link, Template, Job
+from urllib.parse import quote, unquote
+
+
+def normalize_tags(value):
+    """Валидация на раздаление тега через запятую"""
+    if value:
+        tags = [tag.strip() for tag in value.split(',')]
+        if any(not tag for tag in tags):
+            raise serializers.ValidationError("Отсвутствует тэг")
+        return ','.join(tags)
+    return value
+
 
 class TemplateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,27 +32,11 @@ class LinkSerializer(serializers.ModelSerializer):
         read_only_fields = ['code', 'created_at', 'is_active', 'is_taken']
 
     def create(self, validated_data):
-        instance = Link.objects.create(**validated_data)
-
-        template_data = validated_data.pop('template', None)
-
-        if template_data:
-            instance.template = template_data
-
-        instance.is_active = True
-
-        instance.save()
-
-        return instance
+        # Одна запись в БД (template уже в validated_data)
+        return Link.objects.create(**validated_data, is_active=True)
 
     def validate_tags(self, value):
-        """Валидация на раздаление тега через запятую"""
-        if value:
-            tags = [tag.strip() for tag in value.split(',')]
-            if any(not tag for tag in tags):
-                raise serializers.ValidationError("Отсвутствует тэг")
-            return ','.join(tags)
-        return value
+        return normalize_tags(value)
     
     def to_representation(self, instance):
         """Декодирует URL при отдаче данных"""
@@ -54,6 +54,87 @@ class LinkSerializer(serializers.ModelSerializer):
     def get_is_taken(self, obj):
         return obj.is_taken()
 
+class LinkBatchSerializer:
+    """
+    Валидация пачки ссылок для пакетного создания без сериализатора DRF на каждый элемент:
+    поля с их валидаторами берутся из LinkSerializer (один экземпляр на пачку),
+    шаблоны проверяются одним запросом. Ошибки возвращаются списком по элементам, как у many=True
+    """
+    field_names = ('url', 'description', 'tags', 'template_fields')
+
+    def __init__(self, items):
+        self.items = items
+        self.serializer = LinkSerializer()
+        self.fields = {name: self.serializer.fields[name] for name in self.field_names}
+        self.template_field = self.serializer.fields['template']
+
+    def validate(self):
+        """Возвращает (строки для bulk_loader, ошибки или None)"""
+        rows = []
+        errors = []
+        for item in self.items:
+            row, item_errors = self.validate_item(item)
+            rows.append(row)
+            errors.append(item_errors)
+
+        template_ids = {row['template'] for row in rows if row.get('template') is not None}
+        if template_ids:
+            existing = set(Template.objects.filter(pk__in=template_ids).values_list('pk', flat=True))
+            for row, item_errors in zip(rows, errors):
+                template = row.get('template')
+                if template is not None and template not in existing:
+                    item_errors['template'] = [self.template_error('does_not_exist', pk_value=template)]
+
+        if any(errors):
+            return None, errors
+        return rows, None
+
+    def validate_item(self, item):
+        if not isinstance(item, dict):
+            return {}, {'non_field_errors': ['Ожидается объект']}
+        errors = {}
+        row = {}
+
+        for name, field in self.fields.items():
+            value = item.get(name, empty)
+            if name == 'url' and isinstance(value, str):
+                # Кодирование как в LinkSerializer.to_internal_value
+                value = quote(value, safe=':/?&=')
+            try:
+                value = field.run_validation(value)
+                if name == 'tags':
+                    value = self.serializer.validate_tags(value)
+            except SkipField:
+                value = None
+            except serializers.ValidationError as e:
+                errors[name] = e.detail
+                value = None
+            row[name] = value
+
+        # Те же правила, что у PrimaryKeyRelatedField, но наличие шаблонов - одним запросом в validate()
+        template = item.get('template')
+        if template is not None:
+            try:
+                if isinstance(template, bool):
+                    raise TypeError
+                template = Template._meta.pk.to_python(template)
+            except (TypeError, DjangoValidationError):
+                errors['template'] = [self.template_error('incorrect_type', data_type=type(template).__name__)]
+                template = None
+        row['template'] = template
+        return row, errors
+
+    def template_error(self, key, **kwargs):
+        return self.template_field.error_messages[key].format(**kwargs)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('task_id', 'kind', 'state', 'params', 'total', 'processed', 'created', 'existing',
+                  'rejected', 'error', 'artifacts', 'created_at', 'started_at', 'finished_at')
+
+
 class BulkLinkSerializer(serializers.Serializer):
     file = serializers.FileField()
 
@@ -65,9 +146,60 @@ class LinkGETSerializer(serializers.ModelSerializer):
         fields = ('id', 'url', 'code', 'description', 'tags', 'created_at', 'is_active', 'is_taken', 'template', 'template_fields')
 
     def get_code(self, obj):
-        domain_name = os.getenv('DOMAIN_NAME')
-        instance = f'{domain_name}/{obj.code}'
+        instance = f'{settings.DOMAIN_NAME}/{obj.code}'
         return instance
     
     def get_is_taken(self, obj):
-        return obj.is_taken()
\ No newline at end of file
+        return obj.is_taken()
+
+
+class FastLinkListSerializer:
+    """
+    Быстрый read-only сериализатор списка ссылок без машинерии DRF:
+    кортежи values_list(*columns) сразу превращаются в dict.
+    Настройки и форматтеры резолвятся один раз, вывод совпадает с LinkGETSerializer
+    """
+    columns = (
+        'id', 'url', 'code', 'description', 'tags', 'created_at',
+        'is_active', 'template_id', 'template_fields',
+    )
+
+    def __init__(self):
+        self.code_prefix = f'{settings.DOMAIN_NAME}/'
+        self.timezone = timezone.get_current_timezone()
+        if api_settings.DATETIME_FORMAT.lower() != ISO_8601:
+            self.format_datetime = serializers.DateTimeField().to_representation
+
+    def format_datetime(self, value):
+        """То же, что DateTimeField.to_representation для ISO 8601, но без поиска таймзоны на каждую строку"""
+        value = value.astimezone(self.timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    @staticmethod
+    def cursor_key(row):
+        """(created_at, id) строки для keyset-пагинации"""
+        return row[5], row[0]
+
+    def to_representation(self, row):
+        pk, url, code, description, tags, created_at, is_active, template_id, template_fields = row
+        return {
+            'id': pk,
+            'url': url,
+            'code': self.code_prefix + code,
+            'description': description,
+            'tags': tags,
+            'created_at': self.format_datetime(created_at) if created_at else None,
+            'is_active': is_active,
+            'is_taken': url is not None,
+            'template': template_id,
+            'template_fields': template_fields,
+        }
+
+    def many(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+from .cache import link_cache
+from .code_allocator import ensure_sequence
+from .models import Link, Template
+
+
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+def invalidate_link_cache(sender, instance, **kwargs):
+    """Сброс кэша редиректа при изменении или удалении ссылки"""
+    link_cache.invalidate(instance.code)
+
+
+@receiver(post_save, sender=Template)
+def invalidate_template_links(sender, instance, created, **kwargs):
+    """Сброс кэша редиректа у всех ссылок измененного шаблона (адрес в кэше уже отрендерен)"""
+    if created:
+        return
+    codes = Link.objects.filter(template=instance).values_list('code', flat=True)
+    batch = []
+    for code in codes.iterator(chunk_size=5000):
+        batch.append(code)
+        if len(batch) >= 5000:
+            link_cache.invalidate_many(batch)
+            batch = []
+    link_cache.invalidate_many(batch)
+
+
+@receiver(post_migrate)
+def create_code_sequence(sender, using, **kwargs):
+    """Последовательность для аллокатора коротких кодов"""
+    if sender.name == 'shortener':
+        ensure_sequence(using)
@@ -0,0 +1,27 @@
+def split_tags(value):
+    """Строка тегов через запятую -> список тегов без пустых и повторов"""
+    if not value:
+        return []
+    tags = []
+    for tag in value.split(','):
+        tag = tag.strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def filter_by_tags(queryset, tags_all=None, tags_any=None):
+    """
+    Фильтр ссылок по тегам через GIN индекс по tag_list:
+    tags_all - ссылка содержит все теги (@>), tags_any - хотя бы один (&&)
+    """
+    if tags_all:
+        queryset = queryset.filter(tag_list__contains=tags_all)
+    if tags_any:
+        queryset = queryset.filter(tag_list__overlap=tags_any)
+    return queryset
+
+
+def tags_from_params(params):
+    """Теги из query-параметров ?tags=a,b (все) и ?tags_any=a,b (любой)"""
+    return split_tags(params.get('tags')), split_tags(params.get('tags_any'))
@@ -1,289 +1,292 @@
 import os
+import shutil
 import logging
-import base64
 import zipfile
-import qrcode
 import xlsxwriter
-from io import BytesIO
-from qrcode.image.svg import SvgPathImage
-from qrcode.image.pil import PilImage
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-from openpyxl import load_workbook
-from celery import shared_task
+from celery import shared_task, group
+from celery.exceptions import Ignore
 from django.conf import settings
+from django.urls import reverse
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
 from django.core.files.storage import default_storage
 from common.utils.chunk_parsing import get_chunks
-from common.utils.extract_url_from_cell import extract_url_from_cell
-from .models import Link
-
+from .models import Job
+from .jobs import start_job, add_job_links, finish_job, fail_job, job_result, cleanup_jobs, rejected_report_path
+from .import_validation import clean_link_rows, RejectedRowsReport
+from .importers import open_importer
+from .bulk_loader import create_links
+from .qr import qr_store
+from .progress import ProgressReporter
+from .clicks import purge_clicks
+from .exports import get_export_dir, export_queryset, register_archive, cleanup_exports
 
 
 logger = logging.getLogger(__name__)
 
 @shared_task(bind=True)
-def generate_export_file(self, base_url, generate_qr=True):
-    '''Создание и экспортирование ZIP файла, с Excel SVG|PDF файлами'''
+def generate_export_file(self, base_url, generate_qr=True, fingerprint=None, since=None, tags_all=None, tags_any=None):
+    '''
+    Создание и экспортирование ZIP файла, с Excel SVG|PDF файлами.
+    QR-коды рендерятся параллельно пачками (group), архив собирает последняя завершившаяся пачка.
+    since (ISO дата) - дельта-экспорт только новых и измененных ссылок,
+    tags_all/tags_any - экспорт только ссылок с тегами
+    '''
+    # Прогресс пишется в кэш progress (с троттлингом), а не через брокер
+    progress = ProgressReporter(self.request.id, total=100)
     try:
-        self.update_state(
-            state='PROGRESS',
-            meta={
-                'current': 0,
-                'total': 100, 
-                'status': 'Подготовка данных'
-            }
-        )
+        since_dt = parse_datetime(since) if since else None
+
+        progress.update(0, force=True, status='Подготовка данных')
         
         # Общее количествво ссылок, для progress bar-а
-        total_links = Link.objects.count()
+        total_links = export_queryset(since_dt, tags_all, tags_any).count()
         processed_links = 0
+        start_job(self.request.id, Job.KIND_EXPORT, total_links)
+
+        # Рабочая папка экспорта, общая для всех воркеров (MEDIA_ROOT)
+        work_dir = os.path.join(get_export_dir(), 'tmp', self.request.id)
+        os.makedirs(work_dir, exist_ok=True)
         
-        # Создание Excel файла
-        excel_buffer = BytesIO()
-        workbook = xlsxwriter.Workbook(excel_buffer, {'in_memory': True})
+        # Создание Excel файла (constant_memory - строки сбрасываются на диск по мере записи)
+        workbook = xlsxwriter.Workbook(os.path.join(work_dir, 'links.xlsx'), {'constant_memory': True})
         worksheet = workbook.add_worksheet()
         headers = ['url', 'short_url', 'description', '']
         for col, header in enumerate(headers):
             worksheet.write(0, col, header)
 
-        links = Link.objects.all()
+        # Кортежи values_list вместо моделей - без создания объектов Link на каждую строку
+        links = export_queryset(since_dt, tags_all, tags_any).order_by('pk').values_list('pk', 'url', 'code', 'description')
         row = 1
-        links_data = []
+        # Пачки для рендера QR-кодов задаются диапазонами id, а не списками кодов
+        chunk_size = settings.EXPORT_QR_CHUNK_SIZE
+        qr_ranges = []
         
         # Обработка ссылок с обновлением прогресса
-        for chunk in get_chunks(links, chunk_size=100):
-            for link in chunk:
-                links_data.append((link.url, link.code, link.description or ''))
-                worksheet.write(row, 0, link.url)
-                worksheet.write(row, 1, f"{base_url}{link.code}")
-                worksheet.write(row, 2, link.description or '')
+        for chunk in get_chunks(links, chunk_size=1000):
+            for pk, url, code, description in chunk:
+                if processed_links % chunk_size == 0:
+                    qr_ranges.append([pk, pk])
+                qr_ranges[-1][1] = pk
+                worksheet.write(row, 0, url)
+                worksheet.write(row, 1, f"{base_url}{code}")
+                worksheet.write(row, 2, description or '')
                 row += 1
                 processed_links += 1
                 
-                if processed_links % 10 == 0 and total_links > 0:
-                    progress = int((processed_links / total_links) * 50)
-                    self.update_state(
-                        state='PROGRESS', 
-                        meta={
-                            'current': progress,
-                            'total': 100,
-                            'status': f'Обработано {processed_links} из {total_links} ссылок'
-                        }
-                    )
+                current = processed_links * 50 // max(total_links, 1)
+                if progress.due(current):
+                    progress.update(current, force=True,
+                                    status=f'Обработано {processed_links} из {total_links} ссылок')
 
         workbook.close()
-        excel_buffer.seek(0)
+
+        filename = f"links_export_{'delta_' if since else ''}{self.request.id}.zip"
+        if not generate_qr or not qr_ranges:
+            return assemble_export_archive([], work_dir, filename, self.request.id, fingerprint)
         
-        self.update_state(
-            state='PROGRESS',
-            meta={
-                'current': 50,
-                'total': 100,
-                'status': 'Создание ZIP архива'
-            }
-        )
+        progress.update(50, force=True, status=f'Создание {processed_links} QR-кодов')
 
-        # Создание ZIP файла
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.writestr('links.xlsx', excel_buffer.getvalue())
+        # Рендер QR-кодов пачками на всех воркерах. Chord не используется: rpc:// его не поддерживает.
+        # Итог (архив или ошибка) пишется в Job и кэш прогресса, статус задачи остается незавершенным
+        parts = [
+            render_qr_chunk.s(
+                work_dir, index, len(qr_ranges), base_url, first_id, last_id, since, tags_all, tags_any,
+                filename=filename, export_id=self.request.id, fingerprint=fingerprint,
+            ).on_error(report_export_failure.s(self.request.id))
+            for index, (first_id, last_id) in enumerate(qr_ranges)
+        ]
+        group(parts).apply_async()
+        raise Ignore()
 
-            if generate_qr:
-                total_qr_codes = len(links_data)
-                processed_qr = 0
-                
-                for url, code, description in links_data:
-                    short_url = f"{base_url}{code}"
-
-                    # Создание SVG QR-кодов
-                    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-                    qr.add_data(short_url)
-                    qr.make(fit=True)
-                    svg_buffer = BytesIO()
-                    qr.make_image(image_factory=SvgPathImage).save(svg_buffer)
-                    zip_file.writestr(f"qr_codes/{code}.svg", svg_buffer.getvalue())
-
-                    # Создание PNG QR-кодов
-                    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-                    qr.add_data(short_url)
-                    qr.make(fit=True)
-                    png_buffer = BytesIO()
-                    img = qr.make_image(image_factory=PilImage)
-                    img.save(png_buffer, format="PNG")
-                    zip_file.writestr(f"qr_codes/{code}.png", png_buffer.getvalue())
-
-                    # Создание PDF QR-кодов
-                    pdf_buffer = BytesIO()
-                    img_width, img_height = img.size
-                    
-                    c = canvas.Canvas(pdf_buffer, pagesize=(img_width, img_height))
-                    png_buffer.seek(0) 
-                    image_reader = ImageReader(png_buffer)
-                    
-                    c.drawImage(image_reader, 0, 0, width=img_width, height=img_height)
-                    c.showPage()
-                    c.save()
-                    
-                    zip_file.writestr(f"qr_codes/{code}.pdf", pdf_buffer.getvalue())
-
-                    processed_qr += 1
-                    # Обновление прогресса для QR-кодов (оставшиеся 50%)
-                    if total_qr_codes > 0:
-                        qr_progress = 50 + int((processed_qr / total_qr_codes) * 50)
-                        self.update_state(
-                            state='PROGRESS', 
-                            meta={
-                                'current': qr_progress,
-                                'total': 100,
-                                'status': f'Создано {processed_qr} из {total_qr_codes} QR-кодов'
-                            }
-                        )
-
-        zip_buffer.seek(0)
-        
-        # Сохранение файла на серваке
-        filename = f"links_export_{self.request.id}.zip"
-        export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
-        
-        # Создание директории, в случае если она не существует
-        os.makedirs(export_dir, exist_ok=True)
-        
-        filepath = os.path.join(export_dir, filename)
-        
-        with open(filepath, 'wb') as f:
-            f.write(zip_buffer.getvalue())
-        
-        return {
-            "file_path": filepath,
-            "filename": filename,
-            "download_url": f"/media/exports/{filename}",
-            "file_size": os.path.getsize(filepath)
-        }
-        
+    except Ignore:
+        raise
     except Exception as e:
+        progress.fail(str(e))
+        fail_job(self.request.id, str(e))
         self.update_state(state='FAILURE', meta={'error': str(e)})
         return {"error": str(e)}
 
-@shared_task(bind=True)
-def bulk_create_links(self, file_content_base64, base_url):
-    '''Экспортирование Excel файла в БД'''
+
+@shared_task
+def render_qr_chunk(work_dir, index, parts, base_url, first_id, last_id, since=None, tags_all=None, tags_any=None,
+                    filename=None, export_id=None, fingerprint=None):
+    '''
+    Рендер QR-кодов ссылок с id из [first_id, last_id] в отдельный ZIP (без сжатия, сжатие при сборке).
+    parts - всего пачек экспорта: пачка, завершившая набор, собирает архив (assemble_export_archive)
+    '''
+    part_path = os.path.join(work_dir, f"qr_part_{index:05d}.zip")
+    links = export_queryset(parse_datetime(since) if since else None, tags_all, tags_any)
+    codes = links.filter(pk__range=(first_id, last_id)).order_by('pk').values_list('code', flat=True)
+    with zipfile.ZipFile(f"{part_path}.tmp", 'w', zipfile.ZIP_STORED) as part_file:
+        for code in codes.iterator():
+            # QR-коды берутся из кэша, рендерятся только отсутствующие
+            for qr_format, content in qr_store.read_all(f"{base_url}{code}").items():
+                part_file.writestr(f"qr_codes/{code}.{qr_format}", content)
+    # Готовая пачка появляется в work_dir атомарно
+    os.replace(f"{part_path}.tmp", part_path)
+
+    part_paths = collect_qr_parts(work_dir, parts)
+    if part_paths is not None:
+        assemble_export_archive(part_paths, work_dir, filename, export_id, fingerprint)
+    return part_path
+
+
+def collect_qr_parts(work_dir, parts):
+    '''
+    Пути всех пачек, если готовы все parts и сборку еще никто не начал, иначе None.
+    Каждая пачка проверяет набор после своего os.replace, поэтому последняя его увидит;
+    если полный набор увидели несколько пачек, сборку начинает одна (файл-блокировка O_EXCL)
+    '''
+    part_paths = sorted(
+        os.path.join(work_dir, name) for name in os.listdir(work_dir)
+        if name.startswith('qr_part_') and name.endswith('.zip')
+    )
+    if len(part_paths) < parts:
+        return None
     try:
-        # Декодирование содержимого файла из base64
-        file_content = base64.b64decode(file_content_base64)
-        file_buffer = BytesIO(file_content)
-        
-        # Чтение Excel файла
-        workbook = load_workbook(file_buffer)
-        sheet = workbook.active
-        headers = [cell.value for cell in next(sheet.iter_rows(min_row=1, max_row=1)) if cell.value]
-        
-        if 'url' not in headers:
-            raise ValueError("В Excel файле должна быть колонка -> url")
-        
-        total_rows = sheet.max_row - 1
-        
-        self.update_state(
-            state='PROGRESS',
-            meta={
-                'current': 0,
-                'total': total_rows,
-                'percent': 0,
-                'stage': 'Подсчет строк'
-            }
+        os.close(os.open(os.path.join(work_dir, 'assemble.lock'), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return None
+    return part_paths
+
+
+@shared_task
+def assemble_export_archive(part_paths, work_dir, filename, export_id=None, fingerprint=None):
+    '''
+    Сборка итогового ZIP: Excel + QR-коды из частей.
+    Записи копируются потоково во временный файл, который затем атомарно
+    переименовывается в exports (недописанный архив никогда не отдается)
+    '''
+    export_dir = get_export_dir()
+    os.makedirs(export_dir, exist_ok=True)
+    filepath = os.path.join(export_dir, filename)
+    tmp_filepath = os.path.join(work_dir, f"{filename}.part")
+
+    with zipfile.ZipFile(tmp_filepath, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.write(os.path.join(work_dir, 'links.xlsx'), 'links.xlsx')
+        for part_path in sorted(part_paths):
+            with zipfile.ZipFile(part_path) as part_file:
+                for info in part_file.infolist():
+                    with part_file.open(info) as source, zip_file.open(info.filename, 'w') as target:
+                        shutil.copyfileobj(source, target)
+
+    os.replace(tmp_filepath, filepath)
+    artifacts = {
+        "file_path": filepath,
+        "filename": filename,
+        # /media/exports/ наружу закрыт, архив отдает статус экспорта
+        "download_url": reverse('status-of-export', args=[export_id]) if export_id else None,
+        "file_size": os.path.getsize(filepath)
+    }
+    if export_id:
+        finish_job(export_id, processed=F('total'), artifacts=artifacts)
+        # Итог для потока прогресса: архив отдается по ссылке статуса экспорта
+        ProgressReporter(export_id, total=100).finish(
+            status='Архив готов',
+            download_url=reverse('status-of-export', args=[export_id]),
         )
+    if fingerprint:
+        # Регистрация архива для повторной выдачи без пересборки
+        register_archive(fingerprint, export_id, filepath, filename)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if part_paths:
+        evict_qr_cache.delay()
+    
+    return artifacts
 
-        links_to_create = []
-        created_links = []
-        batch_size = 1000
-        processed_rows = 0
+@shared_task
+def report_export_failure(request, exc, traceback, export_id):
+    '''Ошибка рендера пачки QR-кодов или сборки архива -> итоговая запись в кэш прогресса и Job'''
+    ProgressReporter(export_id, total=100).fail(str(exc))
+    fail_job(export_id, str(exc))
 
-        # Получаем индексы колонок
-        url_col_index = headers.index('url')
-        description_col_index = headers.index('description') if 'description' in headers else -1
-        
-        for row_num, row in enumerate(sheet.iter_rows(min_row=2), start=2):
-            url_cell = row[url_col_index]
-            url = extract_url_from_cell(url_cell)
-            
-            # Пропускаем строки без валидного URL
-            if not url or not url.startswith('http'):
-                processed_rows += 1
-                continue
-            
-            # Создаем данные для ссылки
-            link_data = {"url": url, "is_active": True}
-            if description_col_index != -1:
-                description_cell = row[description_col_index]
-                link_data["description"] = description_cell.value or ''
-            
-            links_to_create.append(Link(**link_data))
-            processed_rows += 1
-            
-            # Обновляем прогресс каждые 10 строк
-            if processed_rows % 10 == 0:
-                percent = (processed_rows / total_rows) * 100
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'current': processed_rows,
-                        'total': total_rows,
-                        'percent': round(percent, 2),
-                        'stage': 'Обработка строк'
-                    }
-                )
-
-            if len(links_to_create) >= batch_size:
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'current': processed_rows,
-                        'total': total_rows,
-                        'percent': round((processed_rows / total_rows) * 100, 2),
-                        'stage': 'Сохраняем в БД'
-                    }
-                )
-                Link.objects.bulk_create(links_to_create, batch_size=batch_size)
-                for link in links_to_create:
-                    code = f"{base_url}{link.code}"
-                    created_links.append({
-                        "url": link.url,
-                        "code": code,
-                        "description": link.description,
-                    })
-                links_to_create = []
-
-        # Создание оставшихся записей
-        if links_to_create:
-            self.update_state(
-                state='PROGRESS',
-                meta={
-                    'current': total_rows,
-                    'total': total_rows,
-                    'percent': 100,
-                    'stage': 'Сохранение последних записей в БД'
-                }
-            )
-            Link.objects.bulk_create(links_to_create, batch_size=batch_size)
-            for link in links_to_create:
-                code = f"{base_url}{link.code}"
-                created_links.append({
-                    "url": link.url,
-                    "code": code,
-                    "description": link.description,
-                })
 
-        workbook.close()
-        
-        return {
-            "created_links": created_links,
-            "total_processed": processed_rows,
-            "total_created": len(created_links)
-        }
+@shared_task(bind=True)
+def bulk_create_links(self, file_name, base_url, dedup=False, file_format=None):
+    '''
+    Импорт файла ссылок в БД (file_name - путь к загрузке в default_storage).
+    file_format - имя формата из shortener.importers (xlsx, csv, tsv, ndjson, parquet),
+    по умолчанию определяется по файлу.
+    dedup - для url, на которые уже есть ссылки, новые не создаются (existing),
+    повторы url внутри файла отклоняются.
+    Строки проверяются и нормализуются пачками (clean_link_rows),
+    отклоненные попадают в CSV-отчет (jobs/<task_id>/rejected/).
+    Созданные ссылки сохраняются в JobLink и отдаются постранично (jobs/<task_id>/links/),
+    результат задачи - только итоговые счетчики
+    '''
+    progress = ProgressReporter(self.request.id)
+    try:
+        # Потоковое чтение файла пачками (row, url, description)
+        with open_importer(default_storage.path(file_name), file_format) as importer:
+            # Прогресс пишется в кэш progress (с троттлингом), а не через брокер
+            progress.update(0, total=importer.total, force=True, stage='Подсчет строк')
+            job = start_job(self.request.id, Job.KIND_IMPORT, importer.total)
+
+            seen = {} if dedup else None
+            report = RejectedRowsReport(rejected_report_path(self.request.id))
+            processed_rows = 0
+
+            for batch in importer.iter_batches(batch_size=5000):
+                processed_rows += len(batch)
+                progress.update(processed_rows, force=True, stage='Сохраняем в БД')
+
+                accepted, rejected = clean_link_rows(batch, seen)
+                report.write(rejected)
+                rows = [
+                    {"url": row['url'], "description": row['description'], "is_active": True}
+                    for row in accepted
+                ]
+                # Поиск дублей (dedup) - один IN запрос на пачку
+                add_job_links(job, create_links(rows, dedup=dedup) if rows else [], processed_rows, len(rejected))
+
+        finish_job(self.request.id, processed=processed_rows,
+                   artifacts={'rejected_report': report.path} if report.count else {})
+        job.refresh_from_db()
+        result = job_result(job)
+        progress.finish(stage='Готово', **result)
+        return result
     
     except Exception as e:
+        progress.fail(str(e))
+        fail_job(self.request.id, str(e))
         self.update_state(
             state='FAILURE',
             meta={'error': str(e)}
         )
-        raise
\ No newline at end of file
+        raise
+    finally:
+        # Загруженный файл больше не нужен
+        default_storage.delete(file_name)
+
+
+@shared_task
+def evict_qr_cache():
+    '''Вытеснение старых QR-кодов из кэша при превышении лимита'''
+    removed = qr_store.evict()
+    logger.info(f"Из кэша QR-кодов удалено файлов: {removed}")
+    return removed
+
+
+@shared_task
+def cleanup_finished_jobs():
+    '''Периодическое удаление старых завершенных задач (Job) и их ссылок'''
+    removed = cleanup_jobs(settings.JOB_TTL_SECONDS)
+    logger.info(f"Удалено завершенных задач: {removed}")
+    return removed
+
+
+@shared_task
+def cleanup_export_files():
+    '''Периодическая очистка архивов экспорта по возрасту и общему размеру'''
+    removed = cleanup_exports(settings.EXPORT_TTL_SECONDS, settings.EXPORT_MAX_BYTES)
+    logger.info(f"Удалено архивов экспорта: {removed}")
+    return removed
+
+
+@shared_task
+def purge_old_clicks():
+    '''Периодическое удаление сырых переходов старше CLICK_TRACKING['RETENTION_DAYS'] дней'''
+    removed = purge_clicks(settings.CLICK_TRACKING['RETENTION_DAYS'])
+    logger.info(f"Удалено переходов: {removed}")
+    return removed
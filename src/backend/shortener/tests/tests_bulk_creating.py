@@ -1,10 +1,10 @@
-import base64
 from unittest.mock import patch, MagicMock
 import pytest
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
 
 
 
@@ -29,7 +29,9 @@ def test_bulk_create_links_non_xlsx_file(client):
     file = create_non_xlsx_file()
     response = client.post(reverse('bulk_create_links'), data={'file': file}, format='multipart')
     assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert response.data == {"error": "File must be .xlsx"}
+    assert response.data == {
+        "error": "Unsupported file format, expected one of: .xlsx, .parquet, .ndjson, .jsonl, .tsv, .tab, .csv"
+    }
 
 @pytest.mark.django_db
 @patch('shortener.tasks.bulk_create_links.delay')
@@ -44,9 +46,6 @@ def test_bulk_create_links_success(mock_sleep, mock_time, mock_task, client):
     mock_time.side_effect = [0, 1, 2, 2, 2, 2, 2]
 
     file = create_xlsx_file()
-    file_content = file.read()
-    file.seek(0)
-    expected_base64 = base64.b64encode(file_content).decode('utf-8')
 
     def set_success(*args):
         task.state = 'SUCCESS'
@@ -56,7 +55,9 @@ def test_bulk_create_links_success(mock_sleep, mock_time, mock_task, client):
     response = client.post(reverse('bulk_create_links'), data={'file': file}, format='multipart')
     assert response.status_code == status.HTTP_201_CREATED
     assert response.data == {'success': 'Ссылки созданы'}
-    mock_task.assert_called_once_with(expected_base64, 'http://testserver/')
+    file_name, base_url = mock_task.call_args.args
+    assert file_name.startswith('imports/')
+    assert base_url == 'http://testserver/'
 
 @pytest.mark.django_db
 @patch('shortener.tasks.bulk_create_links.delay')
@@ -126,4 +127,13 @@ def test_bulk_create_links_exception(mock_task, client):
     file = create_xlsx_file()
     response = client.post(reverse('bulk_create_links'), data={'file': file}, format='multipart')
     assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert response.data == {"error": "Неожиданная ошибка"}
\ No newline at end of file
+    assert response.data == {"error": "Неожиданная ошибка"}
+@pytest.mark.django_db
+@patch('shortener.views.uuid.uuid4', return_value='upload-crash')
+@patch('shortener.tasks.bulk_create_links.apply_async')
+def test_bulk_create_links_deletes_upload_when_task_not_started(mock_task, mock_uuid, client):
+    mock_task.side_effect = Exception('Брокер недоступен')
+    file = SimpleUploadedFile('links.csv', b'url\nhttps://example.com\n', content_type='text/csv')
+    response = client.post(reverse('bulk_create_links'), data={'file': file}, format='multipart')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not default_storage.exists('imports/upload-crash.csv')
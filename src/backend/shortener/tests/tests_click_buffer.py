@@ -0,0 +1,47 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import MagicMock
+from django.utils import timezone
+from shortener.clicks import ClickBuffer, save_clicks, purge_clicks
+from shortener.models import Click, LinkDailyClicks
+
+
+
+def make_buffer(**kwargs):
+    flush = MagicMock()
+    buffer = ClickBuffer(flush=flush, flush_interval=3600, **kwargs)
+    # Фоновый поток в тестах не нужен
+    buffer._ensure_thread = lambda: None
+    return buffer, flush
+
+def test_click_buffer_flushes_in_batches():
+    buffer, flush = make_buffer(flush_batch=2)
+    for code in ('a', 'b', 'c'):
+        buffer.record(code)
+    assert buffer.flush() == 3
+    assert [len(call.args[0]) for call in flush.call_args_list] == [2, 1]
+    assert [code for code, _ in flush.call_args_list[0].args[0]] == ['a', 'b']
+    assert len(buffer) == 0
+
+def test_click_buffer_drops_oldest_on_overflow():
+    buffer, flush = make_buffer(maxlen=2)
+    for code in ('a', 'b', 'c'):
+        buffer.record(code)
+    buffer.flush()
+    assert [code for code, _ in flush.call_args.args[0]] == ['b', 'c']
+
+def test_click_buffer_survives_flush_error():
+    buffer, flush = make_buffer(flush_batch=1)
+    flush.side_effect = [Exception('db is down'), None]
+    buffer.record('a')
+    buffer.record('b')
+    assert buffer.flush() == 1
+    assert len(buffer) == 0
+
+@pytest.mark.django_db
+def test_purge_clicks_keeps_daily_counts():
+    now = timezone.now()
+    save_clicks([('abc', now - timedelta(days=100))] * 3 + [('abc', now)])
+    assert purge_clicks(retention_days=90, batch_size=2) == 3
+    assert list(Click.objects.values_list('clicked_at', flat=True)) == [now]
+    assert sum(LinkDailyClicks.objects.values_list('clicks', flat=True)) == 4
@@ -0,0 +1,50 @@
+import itertools
+from unittest.mock import MagicMock
+import pytest
+from shortener.code_allocator import base62_encode, SequentialCodeAllocator, FeistelCodeAllocator
+
+
+
+def make_reserve():
+    counter = itertools.count(1)
+    return MagicMock(side_effect=lambda size: [next(counter) for _ in range(size)])
+
+def no_taken(codes):
+    return codes
+
+def test_base62_encode_pads_to_length():
+    assert base62_encode(0, 6) == '000000'
+    assert base62_encode(61, 3) == '00Z'
+    assert base62_encode(62, 3) == '010'
+
+def test_feistel_is_bijection_on_small_domain():
+    allocator = FeistelCodeAllocator(length=2, key='test', reserve=make_reserve(), check_taken=no_taken)
+    permuted = {allocator.permute(number) for number in range(allocator.domain)}
+    assert permuted == set(range(allocator.domain))
+
+def test_allocator_reserves_by_blocks():
+    reserve = make_reserve()
+    allocator = FeistelCodeAllocator(length=6, block_size=100, key='test', reserve=reserve, check_taken=no_taken)
+    codes = [allocator.next_code() for _ in range(250)]
+    assert len(set(codes)) == 250
+    assert all(len(code) == 6 for code in codes)
+    assert reserve.call_count == 3
+
+def test_allocator_large_batch_in_one_reserve():
+    reserve = make_reserve()
+    allocator = SequentialCodeAllocator(length=6, block_size=10, reserve=reserve, check_taken=no_taken)
+    codes = allocator.allocate(500)
+    assert codes[:2] == ['000001', '000002']
+    reserve.assert_called_once_with(500)
+
+def test_allocator_skips_taken_codes():
+    allocator = SequentialCodeAllocator(
+        length=6, block_size=3, reserve=make_reserve(),
+        check_taken=lambda codes: [code for code in codes if code != '000002']
+    )
+    assert allocator.allocate(3) == ['000001', '000003', '000004']
+
+def test_allocator_overflow():
+    allocator = SequentialCodeAllocator(length=1, block_size=100, reserve=make_reserve(), check_taken=no_taken)
+    with pytest.raises(OverflowError):
+        allocator.next_code()
@@ -0,0 +1,18 @@
+import pytest
+from common.utils.normalize_url import normalize_url
+from shortener.bulk_loader import create_links
+from shortener.dedup import find_existing_codes
+from shortener.models import Link, Template
+
+
+@pytest.mark.django_db
+def test_templated_links_are_not_duplicates():
+    url = 'https://example.com/same'
+    template = Template.objects.create(url_template='https://example.com/t/{token}')
+    templated = Link.objects.create(url=url, template=template, template_fields={'token': 'x'})
+    assert find_existing_codes([normalize_url(url)]) == {}
+
+    plain, again = create_links([{'url': url}, {'url': url, 'template': template}], dedup=True)
+    assert not plain['existing'] and not again['existing']
+    assert len({templated.code, plain['code'], again['code']}) == 3
+    assert find_existing_codes([normalize_url(url)]) == {normalize_url(url): plain['code']}
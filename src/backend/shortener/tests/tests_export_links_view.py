@@ -1,9 +1,14 @@
 import base64
+from datetime import timedelta
 from unittest.mock import patch, MagicMock
 import pytest
+from django.conf import settings
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from shortener.exports import export_watermark
+from shortener.models import Link, Job
 
 
 
@@ -120,10 +125,33 @@ def test_export_links_task_error_result(mock_sleep, mock_time, mock_task, client
     assert response.data == {"error": "Произошла ошибка"}
 
 @pytest.mark.django_db
-@patch('shortener.tasks.generate_export_file.delay')
+@patch('shortener.tasks.generate_export_file.apply_async')
 def test_export_links_exception(mock_task, client):
     mock_task.side_effect = Exception('Неизвестная ошибка')
 
     response = client.get(reverse('export_links'), {'generate_qr': 'true'})
     assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert response.data == {"error": "Неизвестная ошибка"}
\ No newline at end of file
+    assert response.data == {"error": "Неизвестная ошибка"}
+@pytest.mark.django_db
+def test_export_watermark_from_database():
+    assert export_watermark() is None
+    link = Link.objects.create(url='https://example.com/watermark')
+    # updated_at из БД, а не текущее время сервера
+    updated_at = timezone.now() - timedelta(hours=1)
+    Link.objects.filter(pk=link.pk).update(updated_at=updated_at)
+    assert export_watermark() == updated_at - timedelta(seconds=settings.EXPORT_WATERMARK_LAG_SECONDS)
+
+@pytest.mark.django_db
+@patch('shortener.tasks.generate_export_file.apply_async')
+def test_export_job_created_before_dispatch(mock_task, client):
+    mock_task.side_effect = lambda **kwargs: Job.objects.get(task_id=kwargs['task_id'])
+    response = client.get(reverse('export_links'), {'generate_qr': 'false'})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert mock_task.call_args.kwargs['task_id'] == response.data['task_id']
+
+@pytest.mark.django_db
+def test_export_status_archive_removed(client):
+    Job.objects.create(task_id='removed', kind=Job.KIND_EXPORT, state=Job.STATE_SUCCESS,
+                       artifacts={'file_path': '/nonexistent/links.zip', 'filename': 'links.zip'})
+    response = client.get(reverse('status-of-export', args=['removed']))
+    assert response.status_code == status.HTTP_410_GONE
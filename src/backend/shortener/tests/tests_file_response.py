@@ -0,0 +1,55 @@
+import pytest
+from django.test import RequestFactory
+from common.utils.file_response import serve_file
+
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / 'links_export.zip'
+    path.write_bytes(b'0123456789')
+    return str(path)
+
+@pytest.fixture
+def rf():
+    return RequestFactory()
+
+def test_serve_file_full(rf, archive):
+    response = serve_file(rf.get('/'), archive, 'links_export.zip', 'application/zip')
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == b'0123456789'
+    assert response['Content-Length'] == '10'
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response['Content-Disposition'] == 'attachment; filename="links_export.zip"'
+
+def test_serve_file_range(rf, archive):
+    response = serve_file(rf.get('/', HTTP_RANGE='bytes=2-5'), archive, 'a.zip', 'application/zip')
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == b'2345'
+    assert response['Content-Range'] == 'bytes 2-5/10'
+
+def test_serve_file_suffix_range(rf, archive):
+    response = serve_file(rf.get('/', HTTP_RANGE='bytes=-3'), archive, 'a.zip', 'application/zip')
+    assert b''.join(response.streaming_content) == b'789'
+
+def test_serve_file_invalid_range(rf, archive):
+    response = serve_file(rf.get('/', HTTP_RANGE='bytes=20-30'), archive, 'a.zip', 'application/zip')
+    assert response.status_code == 416
+
+@pytest.mark.parametrize('header', ['bytes=0-0,5-6', 'bytes=5-2', 'items=0-1'])
+def test_serve_file_ignores_unsupported_range(rf, archive, header):
+    response = serve_file(rf.get('/', HTTP_RANGE=header), archive, 'a.zip', 'application/zip')
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == b'0123456789'
+
+def test_serve_file_etag(rf, archive):
+    etag = serve_file(rf.get('/'), archive, 'a.zip', 'application/zip')['ETag']
+    response = serve_file(rf.get('/', HTTP_IF_NONE_MATCH=etag), archive, 'a.zip', 'application/zip')
+    assert response.status_code == 304
+    response = serve_file(rf.get('/', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"'), archive, 'a.zip', 'application/zip')
+    assert response.status_code == 200
+
+def test_serve_file_x_accel(rf, archive):
+    response = serve_file(rf.get('/'), archive, 'a.zip', 'application/zip', '/protected/exports/a.zip')
+    assert response['X-Accel-Redirect'] == '/protected/exports/a.zip'
+    assert response.content == b''
@@ -0,0 +1,43 @@
+from shortener.import_validation import clean_link_rows
+
+
+
+def make_rows(urls, descriptions=None, start=2):
+    return list(zip(range(start, len(urls) + start), urls, descriptions or [None] * len(urls)))
+
+def test_clean_link_rows_normalizes_accepted_rows():
+    accepted, rejected = clean_link_rows(make_rows(
+        [' https://example.com/a b ', 'https://пример.рф/путь?q=да', 'https://example.com/%D0%B0'],
+        ['  описание\x07 ', 5, None],
+    ))
+    assert rejected == []
+    assert [row['url'] for row in accepted] == [
+        'https://example.com/a%20b',
+        'https://пример.рф/%D0%BF%D1%83%D1%82%D1%8C?q=%D0%B4%D0%B0',
+        'https://example.com/%D0%B0',
+    ]
+    assert [row['description'] for row in accepted] == ['описание', '5', '']
+
+def test_clean_link_rows_rejects_with_reasons():
+    accepted, rejected = clean_link_rows(make_rows(
+        ['ftp://example.com', None, 'https://bad host/', 'https://example.com/' + 'x' * 2048, None,
+         'https://example.com/%zz', 'https://example.com/?q=100%'],
+        [None, 'без url', None, None, None, None, None],
+    ))
+    assert accepted == []
+    assert {row: error for row, _, _, error in rejected} == {
+        2: 'url должен начинаться с http:// или https://',
+        3: 'Пустой url',
+        4: 'Некорректный хост',
+        5: 'url длиннее 2048 символов',
+        7: 'Некорректное %-кодирование',
+        8: 'Некорректное %-кодирование',
+    }
+
+def test_clean_link_rows_finds_duplicates_across_batches():
+    seen = {}
+    clean_link_rows(make_rows(['https://example.com/a']), seen)
+    batch = make_rows(['HTTPS://EXAMPLE.com/a#top', 'https://example.com/b', 'https://example.com/b'], start=12)
+    accepted, rejected = clean_link_rows(batch, seen)
+    assert [row['row'] for row in accepted] == [13]
+    assert [error for *_, error in rejected] == ['Повтор url из строки 2', 'Повтор url из строки 13']
@@ -0,0 +1,101 @@
+import json
+import pytest
+import pandas as pd
+from openpyxl import Workbook
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from shortener.importers import detect_importer, open_importer, HEAD_SIZE
+from shortener.models import Link
+from shortener.tasks import bulk_create_links
+
+
+LINKS = [('https://example.com/1', 'первая'), ('https://example.com/2', None), ('https://example.com/3', 'третья')]
+
+
+def write_xlsx(path):
+    workbook = Workbook()
+    workbook.active.append(['url', 'description'])
+    for url, description in LINKS:
+        workbook.active.append([url, description])
+    workbook.save(path)
+
+def write_csv(path):
+    # Разделитель ; и BOM - как CSV из Excel
+    lines = ['url;description'] + [f'{url};{description or ""}' for url, description in LINKS]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8-sig')
+
+def write_tsv(path):
+    lines = ['description\turl'] + [f'{description or ""}\t{url}' for url, description in LINKS]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+def write_ndjson(path):
+    lines = [json.dumps({'url': url, 'description': description}) for url, description in LINKS]
+    path.write_text('\n\n'.join(lines) + '\n', encoding='utf-8')
+
+def write_parquet(path):
+    pd.DataFrame(LINKS, columns=['url', 'description']).to_parquet(path)
+
+@pytest.mark.parametrize('file_format, write, rows, total', [
+    ('xlsx', write_xlsx, [2, 3, 4], 3),
+    ('csv', write_csv, [2, 3, 4], 3),
+    ('tsv', write_tsv, [2, 3, 4], 3),
+    # total - оценка по числу строк файла, пустые строки тоже считаются
+    ('ndjson', write_ndjson, [1, 3, 5], 5),
+    ('parquet', write_parquet, [1, 2, 3], 3),
+])
+def test_importers_read_same_rows(tmp_path, file_format, write, rows, total):
+    # Без расширения: формат определяется по содержимому
+    path = tmp_path / 'upload'
+    write(path)
+    assert detect_importer('upload', path.read_bytes()[:HEAD_SIZE]).name == file_format
+
+    with open_importer(str(path)) as importer:
+        assert importer.total == total
+        batches = list(importer.iter_batches(batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 1]
+    numbers, urls, descriptions = zip(*batches[0], *batches[1])
+    assert list(numbers) == rows
+    assert list(urls) == [url for url, _ in LINKS]
+    assert [description or '' for description in descriptions] == [description or '' for _, description in LINKS]
+
+def test_detect_importer_by_extension():
+    assert detect_importer('links.CSV').name == 'csv'
+    assert detect_importer('links.jsonl').name == 'ndjson'
+    assert detect_importer('links.txt', b'Test text content') is None
+
+@pytest.mark.django_db
+def test_bulk_import_from_csv_without_description():
+    content = ContentFile(b'url\nhttps://example.com/csv\nnot-a-url\n')
+    file_name = default_storage.save('imports/test_importers.csv', content)
+    result = bulk_create_links.apply(args=[file_name, 'http://short/'], kwargs={'file_format': 'csv'}).result
+
+    assert (result['total_processed'], result['total_created'], result['total_rejected']) == (2, 1, 1)
+    assert Link.objects.get(url='https://example.com/csv').description == ''
+    assert not default_storage.exists(file_name)
+
+def test_csv_header_with_spaces(tmp_path):
+    path = tmp_path / 'links.csv'
+    path.write_text('url, description\nhttps://example.com/1, первая\n', encoding='utf-8')
+    with open_importer(str(path)) as importer:
+        [[(_, url, description)]] = importer.iter_batches(batch_size=10)
+    assert (url, description.strip()) == ('https://example.com/1', 'первая')
+
+def test_xlsx_importer_closes_file_when_open_fails(tmp_path):
+    path = tmp_path / 'links.xlsx'
+    workbook = Workbook()
+    workbook.active.append(['description'])
+    workbook.save(path)
+    importer = open_importer(str(path))
+    with pytest.raises(ValueError):
+        with importer:
+            pass
+    assert importer.source.closed
+
+def test_csv_rows_are_file_lines(tmp_path):
+    path = tmp_path / 'links.csv'
+    path.write_text(
+        'url,description\n\nhttps://example.com/1,"две\nстроки"\nhttps://example.com/2,\n', encoding='utf-8'
+    )
+    with open_importer(str(path)) as importer:
+        [batch] = importer.iter_batches(batch_size=10)
+    assert batch == [(3, 'https://example.com/1', 'две\nстроки'), (5, 'https://example.com/2', '')]
@@ -0,0 +1,93 @@
+import os
+import zipfile
+import pytest
+from unittest.mock import patch
+from openpyxl import Workbook
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from rest_framework.test import APIClient
+from shortener.bulk_loader import create_links
+from shortener.jobs import create_job
+from shortener.models import Job
+from shortener.tasks import bulk_create_links, generate_export_file
+
+
+
+def upload_workbook(urls):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['url', 'description'])
+    for url in urls:
+        sheet.append([url, 'описание'])
+    content = ContentFile(b'')
+    workbook.save(content)
+    return default_storage.save('imports/test_jobs.xlsx', content)
+
+@pytest.mark.django_db
+def test_bulk_import_stores_links_as_job_rows():
+    create_job('job-task', Job.KIND_IMPORT, base_url='http://short/')
+    urls = [f'https://example.com/jobs/{i}' for i in range(5)]
+    result = bulk_create_links.apply(args=[upload_workbook(urls), 'http://short/'], task_id='job-task').result
+
+    job = Job.objects.get(task_id='job-task')
+    assert job.state == Job.STATE_SUCCESS
+    assert (job.total, job.processed, job.created, job.existing) == (5, 5, 5, 0)
+    assert job.started_at is not None and job.finished_at is not None
+    assert result == {
+        'job_id': job.pk, 'total_processed': 5, 'total_created': 5, 'total_existing': 0, 'total_rejected': 0,
+        'results_url': '/api/shortener/jobs/job-task/links/', 'rejected_url': None,
+    }
+
+    client = APIClient()
+    first = client.get(result['results_url'], {'limit': 3}).json()
+    second = client.get(result['results_url'], {'limit': 3, 'cursor': first['next_cursor']}).json()
+    assert [row['url'] for row in first['results'] + second['results']] == urls
+    assert second['next_cursor'] is None
+    assert first['results'][0]['code'].startswith('http://short/')
+
+    status = client.get(reverse('status-of-link', args=['job-task'])).json()
+    assert status == {'task_id': 'job-task', 'status': 'SUCCESS', 'result': result}
+
+@pytest.mark.django_db
+def test_bulk_import_reports_rejected_rows():
+    urls = ['https://example.com/ok', 'ftp://example.com/file', 'https://Example.com/ok', 'https://example.com/путь']
+    result = bulk_create_links.apply(args=[upload_workbook(urls), 'http://short/', True], task_id='job-rejected').result
+
+    assert (result['total_created'], result['total_rejected']) == (2, 2)
+    response = APIClient().get(result['rejected_url'])
+    assert response.status_code == 200
+    report = b''.join(response.streaming_content).decode()
+    assert report.splitlines() == [
+        'row,url,description,error',
+        '3,ftp://example.com/file,описание,url должен начинаться с http:// или https://',
+        '4,https://Example.com/ok,описание,Повтор url из строки 2',
+    ]
+    links = APIClient().get(result['results_url']).json()['results']
+    assert links[1]['url'] == 'https://example.com/%D0%BF%D1%83%D1%82%D1%8C'
+
+@pytest.mark.django_db
+def test_job_links_view_unknown_job():
+    response = APIClient().get(reverse('job-links', args=['missing']))
+    assert response.status_code == 404
+
+@pytest.mark.django_db
+@patch('shortener.tasks.settings.EXPORT_QR_CHUNK_SIZE', 2)
+@patch('shortener.tasks.evict_qr_cache')
+def test_export_parts_assemble_archive_without_chord(evict_qr_cache):
+    create_links([{'url': f'https://example.com/export/{i}', 'description': '', 'is_active': True} for i in range(3)])
+    create_job('export-task', Job.KIND_EXPORT)
+    with patch('shortener.tasks.group') as dispatched:
+        generate_export_file.apply(args=['http://short/'], task_id='export-task')
+    parts = dispatched.call_args.args[0]
+    assert len(parts) == 2
+    # Пачки завершаются в любом порядке, архив собирает последняя
+    parts[1].apply()
+    assert Job.objects.get(task_id='export-task').state == Job.STATE_PROGRESS
+    parts[0].apply()
+
+    job = Job.objects.get(task_id='export-task')
+    assert job.state == Job.STATE_SUCCESS
+    with zipfile.ZipFile(job.artifacts['file_path']) as archive:
+        assert len([name for name in archive.namelist() if name.startswith('qr_codes/')]) == 9
+    os.remove(job.artifacts['file_path'])
@@ -0,0 +1,17 @@
+import io
+import json
+import pytest
+from common.utils.json_stream import iter_json_array
+
+
+def test_stream_matches_json_load_for_any_buffer_size():
+    data = [{'code': f'c{i}', 'url': f'https://example.com/{i}', 'n': [i, 2.5, None, True]} for i in range(500)]
+    raw = json.dumps(data, indent=1, ensure_ascii=False) + '\n'
+    for buffer_size in (3, 64, 1 << 20):
+        assert list(iter_json_array(io.StringIO(raw), buffer_size)) == data
+
+def test_stream_errors():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"a": 1}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[1, {"a": '), 4))
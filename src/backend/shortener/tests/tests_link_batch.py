@@ -0,0 +1,38 @@
+import pytest
+from shortener.models import Template
+from shortener.serializers import LinkBatchSerializer, LinkSerializer
+
+
+def test_batch_item_is_normalized_like_link_serializer():
+    row, errors = LinkBatchSerializer([]).validate_item({'url': 'https://example.com/а', 'tags': ' a, b '})
+    assert errors == {}
+    assert row['url'] == 'https://example.com/%D0%B0'
+    assert row['tags'] == 'a,b'
+
+def test_batch_item_errors():
+    validator = LinkBatchSerializer([])
+    assert set(validator.validate_item({'url': 'not a url', 'tags': 'a,,b'})[1]) == {'url', 'tags'}
+    assert 'url' in validator.validate_item({'description': 'без url'})[1]
+    assert 'non_field_errors' in validator.validate_item(['https://example.com'])[1]
+
+@pytest.mark.django_db
+def test_batch_item_errors_match_link_serializer():
+    template = Template.objects.create(url_template='https://example.com/t/{token}')
+    items = [
+        {'url': 'https://example.com/ok', 'description': '  с пробелами  '},
+        {'url': 'https://example.com/t', 'template': str(template.pk), 'template_fields': {'token': 'x'}},
+        {'url': 'https://example.com/t', 'template': 'abc', 'template_fields': {'token': 'x'}},
+        {'url': 'https://example.com/t', 'template': template.pk + 1000},
+        {'url': 'https://example.com/t', 'template': True},
+        {'url': 'x' * 3000},
+        {'url': 'https://example.com/ok', 'description': 42, 'tags': ['a']},
+    ]
+    rows = [LinkBatchSerializer([]).validate_item(item)[0] for item in items]
+    _, errors = LinkBatchSerializer(items).validate()
+    for item, row, item_errors in zip(items, rows, errors):
+        single = LinkSerializer(data=dict(item))
+        assert single.is_valid() == (not item_errors), item
+        assert item_errors == single.errors, item
+        if not item_errors:
+            assert row['description'] == single.validated_data.get('description')
+            assert row['template'] == getattr(single.validated_data.get('template'), 'pk', None)
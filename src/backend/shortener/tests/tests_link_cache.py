@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from shortener.async_redirect import RedirectASGIApp
+from shortener.cache import LocalLRUCache, LinkCache, NOT_FOUND
+
+
+
+@pytest.fixture
+def loader():
+    return MagicMock(side_effect=lambda code: {'abc123': 'https://example.com/'}.get(code))
+
+@pytest.fixture
+def cache(loader):
+    return LinkCache(loader=loader, local_maxsize=2, shared_alias=None)
+
+def test_local_lru_evicts_oldest():
+    lru = LocalLRUCache(maxsize=2, ttl=60)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.get('a')
+    lru.set('c', 3)
+    assert lru.get('b') is None
+    assert lru.get('a') == 1
+    assert lru.get('c') == 3
+
+@patch('shortener.cache.time.monotonic')
+def test_local_lru_expires_by_ttl(mock_monotonic):
+    mock_monotonic.return_value = 0
+    lru = LocalLRUCache(maxsize=10, ttl=5)
+    lru.set('a', 1)
+    mock_monotonic.return_value = 6
+    assert lru.get('a') is None
+    assert len(lru) == 0
+
+def test_link_cache_hits_loader_once(cache, loader):
+    assert cache.get_url('abc123') == 'https://example.com/'
+    assert cache.get_url('abc123') == 'https://example.com/'
+    loader.assert_called_once_with('abc123')
+
+def test_link_cache_negative_caching(cache, loader):
+    assert cache.get_url('missing') is None
+    assert cache.get_url('missing') is None
+    loader.assert_called_once_with('missing')
+    assert cache.local.get('missing') == NOT_FOUND
+
+def test_link_cache_invalidate(cache, loader):
+    cache.get_url('abc123')
+    cache.invalidate('abc123')
+    cache.get_url('abc123')
+    assert loader.call_count == 2
+
+def test_link_cache_shared_tier(loader, settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'links': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-links'},
+    }
+    first = LinkCache(loader=loader, shared_alias='links')
+    second = LinkCache(loader=loader, shared_alias='links')
+    first.clear()
+    assert first.get_url('abc123') == 'https://example.com/'
+    assert second.get_url('abc123') == 'https://example.com/'
+    loader.assert_called_once_with('abc123')
+
+@patch('shortener.cache.time.monotonic')
+def test_async_redirect_sees_invalidation_after_local_ttl(mock_monotonic):
+    mock_monotonic.return_value = 0
+    shared = LocMemCache('async-redirect-test', {})
+    urls = {'abc123': 'https://example.com/old'}
+    loads = []
+
+    async def loader(code):
+        loads.append(code)
+        return urls.get(code)
+
+    app = RedirectASGIApp(None, loader, cache=LocalLRUCache(ttl=5), shared=shared)
+    assert asyncio.run(app.get_url('abc123')) == 'https://example.com/old'
+    assert shared.get(LinkCache.make_key('abc123')) == 'https://example.com/old'
+
+    # Ссылку изменили в другом процессе: сигнал обновил только общий кэш
+    shared.set(LinkCache.make_key('abc123'), 'https://example.com/new')
+    assert asyncio.run(app.get_url('abc123')) == 'https://example.com/old'
+    mock_monotonic.return_value = 6
+    assert asyncio.run(app.get_url('abc123')) == 'https://example.com/new'
+
+    # Ссылку удалили: общий кэш очищен, адрес берется из БД
+    urls.clear()
+    shared.delete(LinkCache.make_key('abc123'))
+    mock_monotonic.return_value = 12
+    assert asyncio.run(app.get_url('abc123')) is None
+    assert loads == ['abc123', 'abc123']
@@ -0,0 +1,16 @@
+from common.utils.normalize_url import normalize_url, url_hash
+
+
+def test_equivalent_urls_have_same_hash():
+    assert normalize_url('HTTPS://Example.com:443/а б?q=1') == 'https://example.com/%D0%B0%20%D0%B1?q=1'
+    assert url_hash('https://example.com/%d0%b0') == url_hash('https://EXAMPLE.com/а')
+    assert normalize_url('http://example.com') == 'http://example.com/'
+
+def test_meaningful_differences_are_kept():
+    assert url_hash('https://example.com/?a=1%26b') != url_hash('https://example.com/?a=1&b')
+    assert url_hash('http://example.com:8080/') != url_hash('http://example.com/')
+    assert url_hash('https://example.com/Path') != url_hash('https://example.com/path')
+
+def test_unparsable_url_is_hashed_as_is():
+    assert normalize_url(' http://[::1 ') == 'http://[::1'
+    assert url_hash('http://[::1') == url_hash('http://[::1 ')
@@ -0,0 +1,25 @@
+import pytest
+from django.utils import timezone
+from shortener.models import Link
+from shortener.pagination import keyset_paginate, encode_cursor, InvalidCursor
+
+
+
+@pytest.mark.django_db
+def test_keyset_paginate_walks_ties_in_created_at():
+    links = [Link.objects.create(url=f'https://example.com/page/{i}') for i in range(5)]
+    # Одинаковый created_at: порядок внутри - по id
+    Link.objects.filter(pk__in=[link.pk for link in links[1:4]]).update(created_at=timezone.now())
+    queryset = Link.objects.values('id', 'created_at')
+
+    ids, cursor = [], None
+    while True:
+        rows, cursor = keyset_paginate(queryset, cursor, limit=2)
+        ids += [row['id'] for row in rows]
+        if cursor is None:
+            break
+    expected = Link.objects.order_by('created_at', 'id').values_list('id', flat=True)
+    assert ids == list(expected)
+
+    with pytest.raises(InvalidCursor):
+        keyset_paginate(queryset, encode_cursor(None, links[0].pk))
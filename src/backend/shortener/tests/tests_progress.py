@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from django.core.cache.backends.locmem import LocMemCache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from shortener.progress import ProgressReporter, get_progress
+from shortener.progress_stream import ProgressStreamApp
+
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache():
+    return LocMemCache('progress-test', {})
+
+def test_progress_reporter_throttles_by_interval_and_delta(cache):
+    clock = FakeClock()
+    progress = ProgressReporter('task', total=1000, interval=1, min_delta=5, cache=cache, clock=clock)
+    written = [progress.update(current) for current in range(1000)]
+    # Первая запись и далее каждые 5% (50 строк) при неизменном времени
+    assert sum(written) == 20
+    assert get_progress('task', cache)['current'] == 950
+
+    clock.now = 1.5
+    assert progress.update(960, stage='Обработка строк')
+    assert get_progress('task', cache)['stage'] == 'Обработка строк'
+    assert not progress.update(961)
+
+def test_progress_reporter_force_and_finish(cache):
+    progress = ProgressReporter('task', total=10, interval=60, min_delta=100, cache=cache, clock=FakeClock())
+    assert progress.update(1)
+    assert not progress.update(2)
+    assert progress.update(3, force=True, stage='Сохраняем в БД')
+    progress.finish(stage='Готово')
+    assert get_progress('task', cache) == {
+        'state': 'SUCCESS', 'current': 10, 'total': 10, 'percent': 100.0,
+        'updated_at': get_progress('task', cache)['updated_at'], 'stage': 'Готово',
+    }
+
+@pytest.mark.django_db
+def test_bulk_status_view_reads_progress_channel(cache):
+    task = MagicMock(status='PENDING')
+    ProgressReporter('task-id', total=200, cache=cache).update(50, stage='Обработка строк')
+    with patch('shortener.views.AsyncResult', return_value=task), \
+            patch('shortener.views.get_progress', lambda task_id: get_progress(task_id, cache)):
+        response = APIClient().get(
+            reverse('status-of-link', args=['task-id'])
+        )
+    assert response.status_code == 200
+    assert response.json() == {
+        'task_id': 'task-id', 'status': 'PROGRESS',
+        'progress': 50, 'total': 200, 'percent': 25.0, 'stage': 'Обработка строк',
+    }
+
+def test_progress_stream_sends_progress_and_complete_events(cache):
+    progress = ProgressReporter('task-id', total=10, cache=cache)
+    progress.update(5, stage='Обработка строк')
+    app = ProgressStreamApp(None, cache=cache, poll_interval=0.01)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+        if len(messages) == 3:
+            progress.finish(stage='Готово', result_url='/api/shortener/bulk-create/status/task-id')
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/api/shortener/progress/task-id/stream/'}
+    asyncio.run(asyncio.wait_for(app(scope, receive, send), 5))
+
+    assert messages[0]['status'] == 200
+    body = [message['body'].decode() for message in messages[1:]]
+    assert body[0] == 'retry: 3000\n\n'
+    assert body[1].startswith('event: progress\ndata: {"state": "PROGRESS", "current": 5')
+    assert body[2].startswith('event: complete\ndata: {"state": "SUCCESS", "current": 10')
+    assert '"result_url": "/api/shortener/bulk-create/status/task-id"' in body[2]
+    assert messages[-1]['more_body'] is False
+    assert app._reads == {} and app._listeners == {}
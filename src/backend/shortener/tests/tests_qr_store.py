@@ -0,0 +1,49 @@
+import os
+import pytest
+from shortener.qr import QRArtifactStore, QR_FORMATS
+
+
+
+@pytest.fixture
+def store(tmp_path):
+    return QRArtifactStore(root=str(tmp_path), max_bytes=10 ** 9)
+
+def test_qr_store_renders_all_formats_once(store):
+    paths = store.get_all('http://testserver/abc123')
+    assert set(paths) == set(QR_FORMATS)
+    assert all(os.path.getsize(path) > 0 for path in paths.values())
+    mtimes = {path: os.stat(path).st_mtime_ns for path in paths.values()}
+    os.utime(paths['png'], ns=(0, 0))
+    assert store.get('http://testserver/abc123', 'png') == paths['png']
+    assert os.stat(paths['svg']).st_mtime_ns >= mtimes[paths['svg']]
+    assert os.stat(paths['png']).st_mtime_ns > 0
+
+def test_qr_store_key_depends_on_params(store):
+    assert store.get_path('http://testserver/a', 'png') != store.get_path('http://testserver/a', 'png', box_size=5)
+    assert store.get_path('http://testserver/a', 'png') != store.get_path('http://testserver/a', 'svg')
+
+def test_qr_store_evicts_least_recently_used(store):
+    old_paths = store.get_all('http://testserver/old')
+    new_paths = store.get_all('http://testserver/new')
+    for path in old_paths.values():
+        os.utime(path, (1, 1))
+    store.max_bytes = sum(os.path.getsize(path) for path in new_paths.values()) / 0.9
+    assert store.evict() == 3
+    assert not any(os.path.exists(path) for path in old_paths.values())
+    assert all(os.path.exists(path) for path in new_paths.values())
+
+def test_qr_store_keeps_recently_used_files(store):
+    store.get_all('http://testserver/recent')
+    store.max_bytes = 1
+    assert store.evict() == 0
+    store.min_age = 0
+    assert store.evict() == 3
+
+def test_qr_store_rerenders_evicted_file(store):
+    paths = store.get_all('http://testserver/evicted')
+    content = open(paths['svg'], 'rb').read()
+    os.remove(paths['svg'])
+    # Файл удален вытеснением после get_all
+    store.get_all = lambda *args: paths
+    assert store.read_all('http://testserver/evicted')['svg'] == content
+    assert os.path.exists(paths['svg'])
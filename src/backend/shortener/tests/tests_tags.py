@@ -0,0 +1,15 @@
+from shortener.tags import split_tags, tags_from_params
+from shortener.bulk_loader import _to_copy_array
+
+
+def test_split_tags_strips_and_deduplicates():
+    assert split_tags(' python, django ,,python') == ['python', 'django']
+    assert split_tags(None) == []
+
+def test_tags_from_params():
+    assert tags_from_params({'tags': 'a,b', 'tags_any': 'c'}) == (['a', 'b'], ['c'])
+    assert tags_from_params({}) == ([], [])
+
+def test_copy_array_escapes_quotes_and_backslashes():
+    assert _to_copy_array(['a"b', 'c\\d', 'e, f']) == '{"a\\"b","c\\\\d","e, f"}'
+    assert _to_copy_array([]) == '{}'
@@ -0,0 +1,19 @@
+from shortener.url_templates import resolve_url, compile_template
+
+
+TEMPLATE = 'https://spnavigator.ru/t/{токен}?next={гиперссылка}%3F{параметры}'
+
+
+def test_fields_are_encoded_by_position():
+    fields = {'токен': 'a b', 'гиперссылка': 'https://example.com/?q=1', 'параметры': 'x=1&y=2'}
+    assert resolve_url('https://fallback.ru/', TEMPLATE, fields) == (
+        'https://spnavigator.ru/t/a%20b?next=https%3A%2F%2Fexample.com%2F%3Fq%3D1%3Fx%3D1%26y%3D2'
+    )
+    assert resolve_url('https://fallback.ru/', '{гиперссылка}', fields) == 'https://example.com/?q=1'
+
+def test_missing_fields_fall_back_to_url():
+    assert resolve_url('https://fallback.ru/', TEMPLATE, {'токен': 'a'}) == 'https://fallback.ru/'
+    assert resolve_url('https://fallback.ru/', None, None) == 'https://fallback.ru/'
+
+def test_template_is_compiled_once():
+    assert compile_template(TEMPLATE) is compile_template(TEMPLATE)
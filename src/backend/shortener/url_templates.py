@@ -0,0 +1,66 @@
+import re
+import logging
+from functools import lru_cache
+from urllib.parse import quote
+
+
+logger = logging.getLogger(__name__)
+
+# Поля шаблона: {токен}, {код рассылки}
+PLACEHOLDER = re.compile(r'\{([^{}]+)\}')
+
+
+def _raw(value):
+    return value
+
+
+def _quote_all(value):
+    return quote(value, safe='')
+
+
+class CompiledTemplate:
+    """
+    Шаблон URL, разобранный один раз на литералы и поля.
+    Кодирование значения выбирается по месту поля: поле в начале шаблона ({гиперссылка})
+    задает адрес целиком и вставляется как есть, поля в пути и параметрах кодируются полностью
+    (https://spnavigator.ru/t/{токен}?next={гиперссылка} -> next=https%3A%2F%2F...)
+    """
+    __slots__ = ('url_template', 'literals', 'fields')
+
+    def __init__(self, url_template):
+        self.url_template = url_template
+        self.literals = []
+        self.fields = []
+        position = 0
+        for match in PLACEHOLDER.finditer(url_template):
+            self.literals.append(url_template[position:match.start()])
+            encode = _raw if match.start() == 0 else _quote_all
+            self.fields.append((match.group(1), encode))
+            position = match.end()
+        self.literals.append(url_template[position:])
+
+    def render(self, values):
+        """Подстановка значений полей, KeyError при отсутствии поля"""
+        parts = [self.literals[0]]
+        for (name, encode), literal in zip(self.fields, self.literals[1:]):
+            value = values[name]
+            parts.append(encode('' if value is None else str(value)))
+            parts.append(literal)
+        return ''.join(parts)
+
+
+@lru_cache(maxsize=1024)
+def compile_template(url_template):
+    """Скомпилированный шаблон (кэш по тексту шаблона, изменение шаблона дает новую запись)"""
+    return CompiledTemplate(url_template)
+
+
+def resolve_url(url, url_template=None, template_fields=None):
+    """Адрес для редиректа: у ссылки с шаблоном - шаблон с template_fields, иначе url"""
+    if not url_template or not isinstance(template_fields, dict):
+        return url
+    try:
+        return compile_template(url_template).render(template_fields)
+    except KeyError as e:
+        logger.warning(f"В template_fields нет поля {e} для шаблона {url_template}, используется url")
+        return url
@@ -1,101 +1,223 @@
 import os
-import base64
+import json
 import uuid
 from celery.result import AsyncResult
+from celery.states import READY_STATES
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.parsers import MultiPartParser
+from rest_framework.parsers import MultiPartParser, JSONParser
 from rest_framework import viewsets
-from django.http import HttpResponseRedirect, HttpResponse
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponseRedirect, Http404, FileResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views import View
+from django.core.files.storage import default_storage
 from django.views.generic import TemplateView
-from .models import Link
-from .serializers import LinkSerializer, BulkLinkSerializer, LinkGETSerializer
+from common.utils.file_response import serve_file
+from .models import Link, ExportArchive, LinkDailyClicks, Job
+from .cache import link_cache
+from .clicks import click_buffer
+from .qr import qr_store, QR_FORMATS
+from .serializers import LinkSerializer, BulkLinkSerializer, LinkGETSerializer, FastLinkListSerializer, LinkBatchSerializer, \
+    JobSerializer
+from .parsers import NDJSONParser
+from .importers import HEAD_SIZE, detect_importer, supported_extensions
+from .bulk_loader import create_links
+from .dedup import dedup_enabled, find_existing_codes
+from common.utils.normalize_url import normalize_url
+from .pagination import keyset_paginate, id_paginate, InvalidCursor
+from .jobs import create_job, job_result
+from .tags import filter_by_tags, tags_from_params
 from .tasks import generate_export_file, bulk_create_links
+from .progress import get_progress
+from .exports import get_export_dir, export_fingerprint, find_archive, touch_archive, export_watermark
 
 
 class GetAllLinkView(viewsets.ModelViewSet):
     serializer_class = LinkGETSerializer
+    default_limit = 100
+    max_limit = 1000
+
     def get(self, request):
-        instance = Link.objects.all()
-        serializer = self.get_serializer(instance, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        """
+        Список ссылок постранично (keyset по created_at, id): ?cursor=...&limit=...
+        ?stream=ndjson - вся таблица потоком, по строке JSON на ссылку
+        ?tags=a,b - ссылки со всеми тегами, ?tags_any=a,b - хотя бы с одним
+        """
+        fast_serializer = FastLinkListSerializer()
+        tags_all, tags_any = tags_from_params(request.query_params)
+        links = fast_serializer.values(filter_by_tags(Link.objects.all(), tags_all, tags_any))
+        if request.query_params.get('stream') == 'ndjson':
+            rows = links.order_by('created_at', 'id').iterator(chunk_size=2000)
+            return StreamingHttpResponse(
+                (json.dumps(fast_serializer.to_representation(row), ensure_ascii=False) + '\n' for row in rows),
+                content_type='application/x-ndjson'
+            )
+
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+            rows, next_cursor = keyset_paginate(
+                links, request.query_params.get('cursor'), max(limit, 1), key=fast_serializer.cursor_key
+            )
+        except (ValueError, InvalidCursor) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": fast_serializer.many(rows),
+            "next_cursor": next_cursor,
+        }, status=status.HTTP_200_OK)
 
 
 class CreateLinkView(viewsets.ModelViewSet):
     serializer_class = LinkSerializer
     def post(self, request):
+        """?dedup=true - если ссылка на этот url уже есть, возвращается она (200), а не создается новая"""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
+            if dedup_enabled(request.query_params.get('dedup')) and not serializer.validated_data.get('template'):
+                url = normalize_url(serializer.validated_data['url'])
+                code = find_existing_codes([url]).get(url)
+                if code is not None:
+                    link = Link.objects.get(code=code)
+                    return Response(self.link_data(request, link), status=status.HTTP_200_OK)
             link = serializer.save()
-            short_url = request.build_absolute_uri(f"/{link.code}")
-            response_data = {
-                "code": short_url,
-                "url": link.url,
-                "description": link.description,
-                "tags": link.tags
-            }
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            return Response(self.link_data(request, link), status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def link_data(request, link):
+        return {
+            "code": request.build_absolute_uri(f"/{link.code}"),
+            "url": link.url,
+            "description": link.description,
+            "tags": link.tags
+        }
+
+
+class BatchCreateLinksView(APIView):
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        """
+        Создание пачки ссылок одним запросом: JSON-список (или {"links": [...]}) либо NDJSON.
+        Все ссылки валидируются до вставки, при ошибках не создается ни одна.
+        Короткие ссылки возвращаются в порядке входных данных,
+        ?dedup=true - для уже существующих url возвращаются их коды (existing: true)
+        """
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('links')
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Ожидается непустой список ссылок"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.LINK_BATCH_MAX_SIZE:
+            return Response({"error": f"Не больше {settings.LINK_BATCH_MAX_SIZE} ссылок за запрос"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rows, errors = LinkBatchSerializer(items).validate()
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        base_url = request.build_absolute_uri('/')
+        links = [
+            {
+                "code": f"{base_url}{row['code']}",
+                "url": row['url'],
+                "description": row['description'],
+                "tags": row['tags'],
+                "existing": row['existing'],
+            }
+            for row in create_links(rows, dedup=dedup_enabled(request.query_params.get('dedup')))
+        ]
+        return Response({"links": links}, status=status.HTTP_201_CREATED)
+
 
 class BulkCreateLinksView(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser]
     serializer_class = BulkLinkSerializer
 
     def post(self, request):
+        file_name = None
         try:
             serializer = self.get_serializer(data=request.data)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
             file = request.FILES['file']
-            if not file.name.endswith('.xlsx'):
-                return Response({"error": "File must be .xlsx"}, status=status.HTTP_400_BAD_REQUEST)
+            # Формат по расширению, иначе по первым байтам файла
+            head = file.read(HEAD_SIZE)
+            file.seek(0)
+            importer = detect_importer(file.name, head)
+            if importer is None:
+                return Response(
+                    {"error": f"Unsupported file format, expected one of: {', '.join(supported_extensions())}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
             task_id = str(uuid.uuid4())
 
-            # Чтение содержимого файла и декодирование в base64
-            file_content = file.read()
-            file_content_base64 = base64.b64encode(file_content).decode('utf-8')
+            # Файл сохраняется на диск, в задачу передается только путь к нему
+            file_name = default_storage.save(f"imports/{task_id}{importer.extensions[0]}", file)
+
+            base_url = request.build_absolute_uri('/')
+            dedup = dedup_enabled(request.query_params.get('dedup'))
+            create_job(task_id, Job.KIND_IMPORT, base_url=base_url, dedup=dedup, file_format=importer.name)
 
             # Запуск задачу Celery
             task = bulk_create_links.apply_async(
-                args=[file_content_base64, request.build_absolute_uri('/')],
+                args=[file_name, base_url],
+                kwargs={'dedup': dedup, 'file_format': importer.name},
                 task_id=task_id
             )
 
             return Response({
                 "task_id": task_id,
                 "status": "Задача запущена",
-                "message": "Экспортирование в БД началась"
+                "message": "Экспортирование в БД началась",
+                # Прогресс потоком SSE вместо опроса статуса
+                "progress_stream_url": f"/api/shortener/progress/{task_id}/stream/"
             }, status=status.HTTP_202_ACCEPTED)
 
         except Exception as e:
+            # Задача не запущена - загруженный файл удалять некому
+            if file_name is not None:
+                default_storage.delete(file_name)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class BulkCreateLinkStatusView(APIView):
     def get(self, request, task_id):
         try:
+            # Итог задачи хранится в Job (доступен из любого процесса, в отличие от rpc://)
+            job = Job.objects.filter(task_id=task_id).first()
+            if job is not None and job.state == Job.STATE_SUCCESS:
+                return Response({"task_id": task_id, "status": job.state, "result": job_result(job)})
+            if job is not None and job.state == Job.STATE_FAILURE:
+                return Response({"task_id": task_id, "status": job.state, "error": job.error})
+
             task = AsyncResult(task_id)
+            task_status = task.status
+            # Пока задача не завершена, прогресс берется из кэша progress, итог - из Celery
+            progress = get_progress(task_id) if task_status not in READY_STATES else None
+            if progress is not None:
+                task_status = 'PROGRESS'
             
             response_data = {
                 "task_id": task_id,
-                "status": task.status,
+                "status": task_status,
             }
 
-            if task.status == 'PENDING':
+            if progress is not None:
                 response_data.update({
-                    "message": "Задача ожидает выполнения или не найдена"
+                    "progress": progress.get('current', 0),
+                    "total": progress.get('total', 0),
+                    "percent": progress.get('percent', 0),
+                    "stage": progress.get('stage', 'Processing')
                 })
-            elif task.status == 'PROGRESS':
+            elif task_status == 'PENDING':
                 response_data.update({
-                    "progress": task.result.get('current', 0),
-                    "total": task.result.get('total', 0),
-                    "percent": task.result.get('percent', 0),
-                    "stage": task.result.get('stage', 'Processing')
+                    "message": "Задача ожидает выполнения или не найдена"
                 })
             elif task.status == 'SUCCESS':
                 response_data["result"] = task.result
@@ -115,18 +237,54 @@ class ExportLinksView(APIView):
         """Запуск задачи экспорта ссылок"""
         try:
             generate_qr = request.query_params.get('generate_qr', 'true').lower() == 'true'
+            base_url = request.build_absolute_uri('/')
+            # Отметка для следующего дельта-экспорта (since) - по данным БД, а не по часам сервера
+            watermark = export_watermark()
+            watermark = watermark.isoformat() if watermark else None
+
+            since = request.query_params.get('since')
+            if since:
+                since = parse_datetime(since)
+                if since is None:
+                    return Response({"error": "since должен быть датой в формате ISO 8601"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if timezone.is_naive(since):
+                    since = timezone.make_aware(since)
+
+            tags_all, tags_any = tags_from_params(request.query_params)
+
+            # Если ссылки не менялись, отдается уже собранный архив
+            fingerprint = export_fingerprint(base_url, generate_qr, since, tags_all, tags_any)
+            archive = find_archive(fingerprint)
+            if archive is not None:
+                return Response({
+                    "task_id": archive.task_id,
+                    "status": "Файл готов",
+                    "message": "Ссылки не изменились, используется готовый архив",
+                    "check_status_url": f"/api/shortener/export/status/{archive.task_id}/",
+                    "watermark": watermark
+                }, status=status.HTTP_200_OK)
             
-            # Асинхронный запуск задачи
-            task = generate_export_file.delay(
-                base_url=request.build_absolute_uri('/'),
-                generate_qr=generate_qr
-            )
+            params = {
+                'base_url': base_url,
+                'generate_qr': generate_qr,
+                'since': since.isoformat() if since else None,
+                'tags_all': tags_all,
+                'tags_any': tags_any,
+            }
+
+            # Job создается до запуска: fail_job/start_job задачи всегда находят запись
+            task_id = str(uuid.uuid4())
+            create_job(task_id, Job.KIND_EXPORT, **params)
+            generate_export_file.apply_async(kwargs={'fingerprint': fingerprint, **params}, task_id=task_id)
             
             return Response({
-                "task_id": task.id,
+                "task_id": task_id,
                 "status": "Задача запущена",
                 "message": "Подготовка файла началась",
-                "check_status_url": f"/api/shortener/export/status/{task.id}/"
+                "check_status_url": f"/api/shortener/export/status/{task_id}/",
+                "progress_stream_url": f"/api/shortener/progress/{task_id}/stream/",
+                "watermark": watermark
             }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
@@ -134,26 +292,52 @@ class ExportLinksView(APIView):
 
 
 class ExportLinksStatusView(APIView):
+    def download(self, request, filepath, filename):
+        """Файл отдается nginx-ом или потоково, без чтения в память"""
+        x_accel_location = None
+        if settings.EXPORT_X_ACCEL_REDIRECT:
+            relative_path = os.path.relpath(filepath, get_export_dir())
+            x_accel_location = f"{settings.EXPORT_X_ACCEL_LOCATION}{relative_path}"
+        return serve_file(request, filepath, filename, 'application/zip', x_accel_location)
+
     def get(self, request, task_id):
         try:
+            # Архивы из реестра отдаются без обращения к Celery
+            archive = ExportArchive.objects.filter(task_id=task_id).first()
+            if archive is not None and os.path.exists(archive.file_path):
+                touch_archive(archive)
+                return self.download(request, archive.file_path, archive.filename)
+
+            # Итог задачи из Job (доступен из любого процесса, в отличие от rpc://)
+            job = Job.objects.filter(task_id=task_id).first()
+            if job is not None and job.state == Job.STATE_SUCCESS and os.path.exists(job.artifacts.get('file_path', '')):
+                return self.download(request, job.artifacts['file_path'], job.artifacts['filename'])
+            if job is not None and job.state == Job.STATE_FAILURE:
+                return Response({"error": job.error, "state": job.state}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            if job is not None and job.state == Job.STATE_SUCCESS:
+                # Архив удален очисткой (cleanup_exports); Celery тут не поможет - экспорт с Ignore() остается PENDING
+                return Response({"error": "Архив удален, запустите экспорт заново", "state": job.state},
+                                status=status.HTTP_410_GONE)
+
             task = AsyncResult(task_id)
+            # Пока задача не завершена, прогресс берется из кэша progress, итог - из Celery
+            progress_data = get_progress(task_id) if task.state not in READY_STATES else None
             
-            if task.state == 'PENDING':
-                return Response({
-                    "status": "В обработке",
-                    "state": task.state,
-                    "message": "Задача ожидает выполнения"
-                }, status=status.HTTP_202_ACCEPTED)
-                
-            elif task.state == 'PROGRESS':
-                progress_data = task.result if task.result else {}
+            if progress_data is not None:
                 return Response({
                     "status": "Выполняется",
-                    "state": task.state,
+                    "state": 'PROGRESS',
                     "progress": progress_data.get('current', 0),
                     "total": progress_data.get('total', 100),
                     "status_message": progress_data.get('status', '')
                 }, status=status.HTTP_202_ACCEPTED)
+
+            elif task.state == 'PENDING':
+                return Response({
+                    "status": "В обработке",
+                    "state": task.state,
+                    "message": "Задача ожидает выполнения"
+                }, status=status.HTTP_202_ACCEPTED)
                 
             elif task.state == 'SUCCESS':
                 result = task.result
@@ -169,17 +353,8 @@ class ExportLinksStatusView(APIView):
                     filename = result.get("filename", "links_export.zip")
                     
                     if os.path.exists(filepath):
-                        with open(filepath, 'rb') as f:
-                            zip_data = f.read()
-                        
-                        response = HttpResponse(zip_data, content_type='application/zip')
-                        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                        response['Content-Length'] = len(zip_data)
-                        
-                        # Очистка файла после отправки (TODO надо протестировать)
-                        # self.cleanup_file(filepath)
-                        
-                        return response
+                        # Очистка файлов - периодическая задача cleanup_export_files
+                        return self.download(request, filepath, filename)
                     else:
                         return Response({
                             "error": "Файл не найден на сервере",
@@ -214,10 +389,122 @@ class ExportLinksStatusView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
 
+class JobView(APIView):
+    def get(self, request, task_id):
+        """Состояние задачи импорта/экспорта: счетчики, время, артефакты (+ прогресс, пока выполняется)"""
+        job = Job.objects.filter(task_id=task_id).first()
+        if job is None:
+            return Response({"error": "Задача не найдена"}, status=status.HTTP_404_NOT_FOUND)
+        data = JobSerializer(job).data
+        if job.state not in (Job.STATE_SUCCESS, Job.STATE_FAILURE):
+            data["progress"] = get_progress(task_id)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class JobLinksView(APIView):
+    default_limit = 100
+    max_limit = 1000
+
+    def get(self, request, task_id):
+        """Ссылки, созданные импортом, постранично (keyset по id): ?cursor=...&limit=..."""
+        job = Job.objects.filter(task_id=task_id).first()
+        if job is None:
+            return Response({"error": "Задача не найдена"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+            rows, next_cursor = id_paginate(
+                job.links.values('id', 'url', 'code', 'description', 'existing'),
+                request.query_params.get('cursor'), max(limit, 1)
+            )
+        except (ValueError, InvalidCursor) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        base_url = job.params.get('base_url') or request.build_absolute_uri('/')
+        return Response({
+            "state": job.state,
+            "results": [{
+                "url": row['url'],
+                "code": f"{base_url}{row['code']}",
+                "description": row['description'],
+                "existing": row['existing'],
+            } for row in rows],
+            "next_cursor": next_cursor,
+        }, status=status.HTTP_200_OK)
+
+
+class JobRejectedView(APIView):
+    def get(self, request, task_id):
+        """CSV-отчет об отклоненных строках импорта (row, url, description, error)"""
+        job = Job.objects.filter(task_id=task_id).first()
+        path = job.artifacts.get('rejected_report') if job is not None else None
+        if not path or not os.path.exists(path):
+            return Response({"error": "Отчет не найден"}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, path, os.path.basename(path), 'text/csv')
+
+
+class QRCodeView(APIView):
+    CONTENT_TYPES = {
+        'svg': 'image/svg+xml',
+        'png': 'image/png',
+        'pdf': 'application/pdf',
+    }
+
+    def get(self, request, code):
+        """QR-код короткой ссылки (из кэша QR-кодов, при отсутствии рендерится)"""
+        # format занят DRF (URL_FORMAT_OVERRIDE), поэтому тип файла передается в type
+        qr_format = request.query_params.get('type', 'png').lower()
+        if qr_format not in QR_FORMATS:
+            return Response({"error": f"Формат должен быть одним из: {', '.join(QR_FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            box_size = int(request.query_params.get('box_size', 10))
+            border = int(request.query_params.get('border', 4))
+        except ValueError:
+            return Response({"error": "box_size и border должны быть числами"}, status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= box_size <= 50 and 0 <= border <= 20):
+            return Response({"error": "box_size должен быть от 1 до 50, border от 0 до 20"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if link_cache.get_url(code) is None:
+            return Response({"error": "Ссылка не найдена"}, status=status.HTTP_404_NOT_FOUND)
+
+        short_url = f"{request.build_absolute_uri('/')}{code}"
+        return FileResponse(
+            qr_store.open(short_url, qr_format, box_size, border),
+            content_type=self.CONTENT_TYPES[qr_format],
+            filename=f"{code}.{qr_format}"
+        )
+
+
+class LinkClicksView(APIView):
+    def get(self, request, code):
+        """Переходы по ссылке по дням: ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD"""
+        clicks = LinkDailyClicks.objects.filter(code=code).order_by('day')
+        date_from = request.query_params.get('date_from')
+        date_to = request.query_params.get('date_to')
+        try:
+            if date_from:
+                clicks = clicks.filter(day__gte=date_from)
+            if date_to:
+                clicks = clicks.filter(day__lte=date_to)
+            days = [{"day": day, "clicks": count} for day, count in clicks.values_list('day', 'clicks')]
+        except ValidationError as e:
+            return Response({"error": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "code": code,
+            "total": sum(day["clicks"] for day in days),
+            "days": days,
+        }, status=status.HTTP_200_OK)
+
+
 class RedirectView(View):
     def get(self, request, code):
-        link = get_object_or_404(Link, code=code)
-        return HttpResponseRedirect(link.url)
+        url = link_cache.get_url(code)
+        if url is None:
+            raise Http404("Ссылка не найдена")
+        if settings.CLICK_TRACKING['ENABLED']:
+            click_buffer.record(code)
+        return HttpResponseRedirect(url)
     
 class ExportTemplateView(TemplateView):
     template_name = 'export_template.html'